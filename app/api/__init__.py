@@ -1,3 +1,7 @@
 from .stock import router
+from .symbols import router as symbols_router
+from .portfolio import router as portfolio_router
+from .screener import router as screener_router
+from .export import router as export_router
 
-__all__ = ["router"]
\ No newline at end of file
+__all__ = ["router", "symbols_router", "portfolio_router", "screener_router", "export_router"]
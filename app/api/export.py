@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+
+from app.services.export import MEDIA_TYPES, ExportService
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+def get_export_service() -> ExportService:
+    return ExportService()
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values (gzip;q=0 refuses it)"""
+    qualities = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip()] = quality
+    return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+@router.get("")
+async def export_stocks(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    cursor: Optional[str] = Query(None, description="cursor of the last record received, to resume an interrupted export"),
+    export_service: ExportService = Depends(get_export_service)
+):
+    after = export_service.resume_after(cursor)
+    compress = accepts_gzip(request.headers.get("accept-encoding", ""))
+    headers = {
+        "Content-Disposition": f'attachment; filename="stocks.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_service.stream(format, after, compress),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
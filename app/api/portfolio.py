@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.repositories.stock import StockRepository
+from app.services.portfolio import PortfolioService
+from app.schemas.portfolio import PortfolioResponse
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+async def get_portfolio_service(db: AsyncSession = Depends(get_db)) -> PortfolioService:
+    return PortfolioService(StockRepository(db))
+
+@router.get("", response_model=PortfolioResponse)
+async def get_portfolio(portfolio_service: PortfolioService = Depends(get_portfolio_service)):
+    return await portfolio_service.get_portfolio()
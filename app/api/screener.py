@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+
+from app.database import get_db
+from app.repositories.stock import StockRepository
+from app.services.screener import ScreenerService
+from app.schemas.screener import ScreenerQuery, ScreenerResponse, ScreenerSort
+
+router = APIRouter(prefix="/screener", tags=["screener"])
+
+async def get_screener_service(db: AsyncSession = Depends(get_db)) -> ScreenerService:
+    return ScreenerService(StockRepository(db))
+
+def get_screener_query(
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    min_volume: Optional[int] = Query(None, ge=0),
+    max_volume: Optional[int] = Query(None, ge=0),
+    min_perf_5d: Optional[float] = Query(None),
+    max_perf_5d: Optional[float] = Query(None),
+    min_perf_1m: Optional[float] = Query(None),
+    max_perf_1m: Optional[float] = Query(None),
+    min_perf_3m: Optional[float] = Query(None),
+    max_perf_3m: Optional[float] = Query(None),
+    min_perf_ytd: Optional[float] = Query(None),
+    max_perf_ytd: Optional[float] = Query(None),
+    min_perf_1y: Optional[float] = Query(None),
+    max_perf_1y: Optional[float] = Query(None),
+    sort: ScreenerSort = Query("symbol"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+) -> ScreenerQuery:
+    # Declared as query parameters so out-of-range values are a 422, not a ValidationError raised inside a dependency
+    return ScreenerQuery(**locals())
+
+@router.get("", response_model=ScreenerResponse)
+async def screen_stocks(
+    query: ScreenerQuery = Depends(get_screener_query),
+    screener_service: ScreenerService = Depends(get_screener_service)
+):
+    return await screener_service.screen(query)
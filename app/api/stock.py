@@ -7,6 +7,7 @@ from app.repositories.stock import StockRepository
 from app.services.stock import StockService
 from app.schemas.stock import StockResponse, StockUpdate
 from app.exceptions import StockNotFoundException, StockAPIException
+from app.symbols import normalize_symbol
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/stock", tags=["stocks"])
@@ -50,7 +51,7 @@ async def update_stock_amount(
     try:
         await stock_service.update_stock_amount(stock_symbol, stock_update.amount)
         return {
-            "message": f"{stock_update.amount} units of stock {stock_symbol.upper()} were added to your stock record"
+            "message": f"{stock_update.amount} units of stock {normalize_symbol(stock_symbol)} were added to your stock record"
         }
     except StockAPIException:
         raise 
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+from typing import List
+
+from app.schemas.symbol import SymbolResponse
+from app.symbols import symbol_index
+
+router = APIRouter(prefix="/symbols", tags=["symbols"])
+
+@router.get("", response_model=List[SymbolResponse])
+async def search_symbols(
+    prefix: str = Query(..., min_length=1, max_length=16, description="Symbol prefix to complete"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    await symbol_index.refresh()
+    return [
+        SymbolResponse(symbol=symbol, name=name)
+        for symbol, name in symbol_index.search(prefix, limit)
+    ]
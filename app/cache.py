@@ -1,11 +1,13 @@
-import redis.asyncio as redis
 import json
 import logging
-from typing import Optional
+import random
+import time
+from typing import List, Optional
 
 from app.exceptions import CacheException
 
 from app.config import settings
+from app.metrics import CACHE_OPERATION_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +15,61 @@ class CacheService:
     def __init__(self):
         self.redis_url = settings.REDIS_URL
         self._redis = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """False from a failed connection until the next successful one"""
+        return self._failures == 0
 
     async def get_redis(self):
-        if not self._redis:
+        if self._redis:
+            return self._redis
+        if time.monotonic() < self._retry_at:
+            # Fail fast while backing off, so an outage does not add a connect timeout to every request
+            raise CacheException("Redis unavailable, reconnect pending")
+        # Imported on first connection rather than with the app, which keeps it off the cold-start path
+        import redis.asyncio as redis
+        client = redis.from_url(
+            self.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+        try:
+            await client.ping()
+        except Exception as e:
+            await client.aclose()
+            delay = self._schedule_retry()
+            logger.error(f"Failed to connect to Redis, retrying in {delay:.1f}s: {e}")
+            raise CacheException(f"Redis connection failed: {str(e)}")
+        if self._failures:
+            logger.info(f"Reconnected to Redis after {self._failures} failed attempts")
+        self._failures = 0
+        self._redis = client
+        return client
+
+    def _schedule_retry(self) -> float:
+        self._failures += 1
+        delay = min(settings.REDIS_RETRY_MAX_DELAY, settings.REDIS_RETRY_BASE_DELAY * 2 ** (self._failures - 1))
+        # Jitter keeps workers that lost Redis together from reconnecting in lockstep
+        delay *= random.uniform(0.5, 1.0)
+        self._retry_at = time.monotonic() + delay
+        return delay
+
+    async def _connection_lost(self, e: Exception):
+        from redis.exceptions import ConnectionError, TimeoutError
+        # Errors that mean the server is gone rather than that one command failed
+        if isinstance(e, (ConnectionError, TimeoutError, OSError)) and self._redis:
+            client, self._redis = self._redis, None
+            self._schedule_retry()
             try:
-                self._redis = redis.from_url(self.redis_url, decode_responses=True)
-                await self._redis.ping()
-            except Exception as e:
-                logger.error(f"Failed to connect to Redis: {e}")
-                raise CacheException(f"Redis connection failed: {str(e)}")
-        return self._redis
+                await client.aclose()
+            except Exception:
+                pass
 
+    @timed(CACHE_OPERATION_SECONDS, operation="get")
     async def get(self, key: str) -> Optional[dict]:
         try:
             redis_client = await self.get_redis()
@@ -34,9 +80,24 @@ class CacheService:
         except CacheException:
             raise
         except Exception as e:
+            await self._connection_lost(e)
             logger.error(f"Cache get error for key {key}: {e}")
             raise CacheException(f"Failed to get key {key}: {str(e)}")
 
+    @timed(CACHE_OPERATION_SECONDS, operation="get_many")
+    async def get_many(self, keys: List[str]) -> List[Optional[dict]]:
+        try:
+            redis_client = await self.get_redis()
+            values = await redis_client.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except CacheException:
+            raise
+        except Exception as e:
+            await self._connection_lost(e)
+            logger.error(f"Cache get error for keys {keys}: {e}")
+            raise CacheException(f"Failed to get keys {keys}: {str(e)}")
+
+    @timed(CACHE_OPERATION_SECONDS, operation="set")
     async def set(self, key: str, value: dict, ttl: int = None) -> bool:
         try:
             redis_client = await self.get_redis()
@@ -48,9 +109,11 @@ class CacheService:
         except CacheException:
             raise
         except Exception as e:
+            await self._connection_lost(e)
             logger.error(f"Cache set error for key {key}: {e}")
             raise CacheException(f"Failed to set key {key}: {str(e)}")
 
+    @timed(CACHE_OPERATION_SECONDS, operation="delete")
     async def delete(self, key: str) -> bool:
         try:
             redis_client = await self.get_redis()
@@ -59,6 +122,7 @@ class CacheService:
         except CacheException:
             raise
         except Exception as e:
+            await self._connection_lost(e)
             logger.error(f"Cache delete error for key {key}: {e}")
             raise CacheException(f"Failed to delete key {key}: {str(e)}")
 
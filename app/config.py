@@ -5,13 +5,50 @@ load_dotenv()
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./stocks.db")
+    # Seconds a SQLite connection waits for another writer before failing with "database is locked"
+    SQLITE_BUSY_TIMEOUT: float = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
     POLYGON_API_KEY: str = os.getenv("POLYGON_API_KEY", "")
-    POLYGON_URL: str = "https://api.polygon.io/v1/open-close"
-    MARKETWATCH_BASE_URL: str = "https://www.marketwatch.com/investing/stock"
+    POLYGON_URL: str = os.getenv("POLYGON_URL", "https://api.polygon.io/v1/open-close")
+    MARKETWATCH_BASE_URL: str = os.getenv("MARKETWATCH_BASE_URL", "https://www.marketwatch.com/investing/stock")
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
+    # Reconnect attempts back off exponentially from the base delay up to the max
+    REDIS_RETRY_BASE_DELAY: float = float(os.getenv("REDIS_RETRY_BASE_DELAY", "1.0"))
+    REDIS_RETRY_MAX_DELAY: float = float(os.getenv("REDIS_RETRY_MAX_DELAY", "30"))
     
-    CACHE_TTL: int = 60
+    SYMBOLS_FILE: str = os.getenv("SYMBOLS_FILE", "./data/symbols.csv")
+    SYMBOLS_RELOAD_INTERVAL: float = float(os.getenv("SYMBOLS_RELOAD_INTERVAL", "30"))
+
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    # Records allowed per call site per interval; 0 disables rate limiting
+    LOG_RATE_LIMIT_BURST: int = int(os.getenv("LOG_RATE_LIMIT_BURST", "20"))
+    LOG_RATE_LIMIT_INTERVAL: float = float(os.getenv("LOG_RATE_LIMIT_INTERVAL", "60"))
+
+    # Port on which the Celery worker serves its own /metrics; 0 disables it
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    # Profiling is only possible when an admin token is configured
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    PROFILER_INTERVAL: float = float(os.getenv("PROFILER_INTERVAL", "0.001"))
+
+    # live talks to the real upstreams; record also saves every response to UPSTREAM_CORPUS; replay serves only the corpus
+    UPSTREAM_MODE: str = os.getenv("UPSTREAM_MODE", "live").lower()
+    UPSTREAM_CORPUS: str = os.getenv("UPSTREAM_CORPUS", "./data/upstream_corpus.jsonl.gz")
+    # 1.0 replays with the recorded upstream latency, 0 answers immediately
+    UPSTREAM_REPLAY_DELAY_SCALE: float = float(os.getenv("UPSTREAM_REPLAY_DELAY_SCALE", "1.0"))
+
+    # Latest quotes on local disk, served while Redis is down; 0 disables the API's periodic rewrite
+    QUOTE_SNAPSHOT_FILE: str = os.getenv("QUOTE_SNAPSHOT_FILE", "./data/quotes.snapshot")
+    QUOTE_SNAPSHOT_INTERVAL: float = float(os.getenv("QUOTE_SNAPSHOT_INTERVAL", "60"))
+    QUOTE_SNAPSHOT_MAX_AGE: int = int(os.getenv("QUOTE_SNAPSHOT_MAX_AGE", "900"))
+
+    # Rows per streaming read and per response chunk of GET /export
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "60"))
+    NEGATIVE_CACHE_TTL: int = int(os.getenv("NEGATIVE_CACHE_TTL", "120"))
     # STOCK_SYMBOLS: list = ["AAPL", "GOOGL", "MSFT", "TSLA", "AMZN"]
     STOCK_SYMBOLS: list = ["AAPL"]
 
@@ -1,24 +1,75 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import Column, MetaData, String, Table, event, insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-import os
+from sqlalchemy.schema import CreateIndex, CreateTable
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import json
+import logging
+import weakref
+from typing import Optional
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 class Base(DeclarativeBase):
     pass
 
 DATABASE_URL = settings.DATABASE_URL
 ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+    # WAL lets readers run alongside the single writer; without it every SELECT blocks commits
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+def create_database_engine(url: Optional[str] = None):
+    """Async engine for the app database; SQLite connections use WAL and wait SQLITE_BUSY_TIMEOUT for the write lock"""
+    engine = create_async_engine(url or ASYNC_DATABASE_URL)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _configure_sqlite)
+    return engine
+
+def create_session_factory(engine) -> async_sessionmaker:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-async_engine = create_async_engine(ASYNC_DATABASE_URL)
-AsyncSessionLocal = async_sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
+async_engine = create_database_engine()
+AsyncSessionLocal = create_session_factory(async_engine)
+
+# Bookkeeping lives outside Base.metadata so it never changes the schema version itself
+schema_meta = Table(
+    "schema_meta", MetaData(),
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False),
 )
 
+# One per event loop: asyncio locks cannot be shared between loops
+_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+@asynccontextmanager
+async def write_transaction(session: AsyncSession):
+    """Queue a write transaction behind the other writers in this process; a no-op off SQLite.
+
+    SQLite has a single writer, and a connection that finds the write lock taken
+    polls for it with sleeps of up to 100 ms. Under concurrency the lock then sits
+    idle between polls while waiters pile up and time out. Waiting here instead
+    hands it over in arrival order; SQLITE_BUSY_TIMEOUT still covers other processes.
+    """
+    if session.bind is None or session.bind.dialect.name != "sqlite":
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    async with lock:
+        yield
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -26,5 +77,101 @@ async def get_db():
         finally:
             await session.close()
 
+# Data steps run by upgrade_schema; adding one changes the schema version so stamped databases run it too
+UPGRADE_STEPS = ("missing_indexes", "performance_backfill")
+
+def schema_version(dialect) -> str:
+    """Hash of the DDL for every mapped table and index, and of the upgrade steps"""
+    import app.models  # noqa: F401  registers every table on Base.metadata
+    statements = list(UPGRADE_STEPS)
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(statements).encode()).hexdigest()[:16]
+
+def upgrade_schema(conn):
+    """Bring a database to the mapped schema: new tables, indexes added to existing tables, derived data.
+
+    create_all skips tables that already exist together with their indexes,
+    so each index is created separately when it is missing.
+    """
+    from app.models.performance import PERFORMANCE_WINDOWS, StockPerformance
+    from app.models.stock import Stock
+
+    Base.metadata.create_all(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+    # Rows stored before stock_performance existed only have the scraped JSON
+    rows = conn.execute(
+        select(Stock.symbol, Stock.performance)
+        .outerjoin(StockPerformance, StockPerformance.symbol == Stock.symbol)
+        .where(StockPerformance.symbol.is_(None), Stock.performance.is_not(None))
+    ).all()
+    backfill = []
+    for symbol, performance in rows:
+        try:
+            scraped = json.loads(performance)
+        except ValueError:
+            continue
+        metrics = StockPerformance.from_scraped(symbol, scraped) if isinstance(scraped, dict) else None
+        if metrics is not None:
+            backfill.append({"symbol": metrics.symbol, **{column: getattr(metrics, column) for column in PERFORMANCE_WINDOWS.values()}})
+    if backfill:
+        conn.execute(insert(StockPerformance), backfill)
+        logger.info(f"Backfilled performance metrics for {len(backfill)} stocks")
+
+async def _stored_version(conn) -> Optional[str]:
+    return (await conn.execute(select(schema_meta.c.value).where(schema_meta.c.key == "version"))).scalar()
+
+async def init_schema(engine=None) -> bool:
+    """Run upgrade_schema on the async engine, skipped when the stored schema version matches.
+
+    Returns True when the upgrade ran. Safe to run from several workers at
+    once: on SQLite the write lock is taken before the version check, so the
+    others wait and then find the new version. Columns are never added or
+    changed; that still needs a migration.
+    """
+    engine = engine or async_engine
+    version = schema_version(engine.dialect)
+    try:
+        async with engine.connect() as conn:
+            if engine.dialect.name == "sqlite":
+                await conn.exec_driver_sql("BEGIN IMMEDIATE")
+            await conn.run_sync(schema_meta.create, checkfirst=True)
+            current = await _stored_version(conn)
+            if current == version:
+                await conn.commit()
+                return False
+            await conn.run_sync(upgrade_schema)
+            if current is None:
+                await conn.execute(insert(schema_meta).values(key="version", value=version))
+            else:
+                await conn.execute(update(schema_meta).where(schema_meta.c.key == "version").values(value=version))
+            await conn.commit()
+    except (IntegrityError, OperationalError, ProgrammingError) as e:
+        # Without a database-wide lock another process can win the race; its schema is as good as ours
+        if not isinstance(e, IntegrityError) and "already exists" not in str(e):
+            raise
+        async with engine.connect() as conn:
+            if await _stored_version(conn) != version:
+                raise
+        logger.info(f"Database schema version {version} was initialised by another process")
+        return False
+    logger.info(f"Database schema initialised at version {version}")
+    return True
+
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """Synchronous entry point for scripts without a running loop; async callers await init_schema() instead.
+
+    Uses its own engine so no pooled connection outlives the loop.
+    """
+    async def _create():
+        engine = create_database_engine()
+        try:
+            await init_schema(engine)
+        finally:
+            await engine.dispose()
+    asyncio.run(_create())
\ No newline at end of file
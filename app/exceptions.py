@@ -25,4 +25,21 @@ class InvalidStockDataException(StockAPIException):
 class CacheException(StockAPIException):
     """Exception for cache-related errors"""
     def __init__(self, message: str):
-        super().__init__(f"Cache error: {message}", 500)
\ No newline at end of file
+        super().__init__(f"Cache error: {message}", 500)
+
+class ExternalNotFoundException(ExternalAPIException):
+    """Exception when an external API reports the symbol as unknown"""
+    def __init__(self, service: str, symbol: str):
+        super().__init__(service, f"Stock {symbol} not found")
+        self.symbol = symbol
+
+class InvalidSymbolException(StockAPIException):
+    """Exception for malformed stock symbols"""
+    def __init__(self, symbol: str):
+        super().__init__(f"Invalid stock symbol: {symbol}", 400)
+        self.symbol = symbol
+
+class InvalidQueryException(StockAPIException):
+    """Exception for invalid query parameters such as a malformed cursor"""
+    def __init__(self, message: str):
+        super().__init__(f"Invalid query: {message}", 400)
@@ -0,0 +1,84 @@
+"""Build the symbol reference file (SYMBOLS_FILE) from Nasdaq Trader's symbol directory.
+
+nasdaqlisted.txt covers Nasdaq listings and otherlisted.txt NYSE, NYSE American,
+NYSE Arca, Cboe and IEX listings; together they are every US-listed ticker.
+Sources are URLs or local copies of the pipe-delimited files.
+
+Usage: python -m app.load_symbols [--output data/symbols.csv] [source ...]
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable
+
+import httpx
+
+from app.config import settings
+from app.symbols import is_valid_symbol, normalize_symbol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCES = (
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+)
+
+def parse_symbol_directory(text: str) -> Dict[str, str]:
+    """symbol -> security name from one directory file, without test issues or symbols the API would reject"""
+    names = {}
+    for row in csv.DictReader(io.StringIO(text), delimiter="|"):
+        symbol = row.get("Symbol") or row.get("ACT Symbol") or ""
+        # The last line is a "File Creation Time: ..." trailer
+        if symbol.startswith("File Creation Time") or row.get("Test Issue") == "Y":
+            continue
+        symbol = normalize_symbol(symbol)
+        if is_valid_symbol(symbol):
+            names[symbol] = (row.get("Security Name") or "").strip()
+    return names
+
+def read_source(source: str) -> str:
+    if source.startswith(("http://", "https://")):
+        response = httpx.get(source, timeout=30.0, follow_redirects=True)
+        response.raise_for_status()
+        return response.text
+    with open(source, encoding="utf-8") as f:
+        return f.read()
+
+def write_symbols(path: str, names: Dict[str, str]):
+    """Write symbol,name rows atomically; a running API picks the new file up on its next refresh"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".symbols-")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["symbol", "name"])
+            writer.writerows(sorted(names.items()))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def build_symbols(sources: Iterable[str], output: str) -> int:
+    names = {}
+    for source in sources:
+        parsed = parse_symbol_directory(read_source(source))
+        logger.info(f"Read {len(parsed)} symbols from {source}")
+        names.update(parsed)
+    write_symbols(output, names)
+    return len(names)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", default=list(DEFAULT_SOURCES))
+    parser.add_argument("--output", default=settings.SYMBOLS_FILE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    count = build_symbols(args.sources, args.output)
+    print(f"{count} symbols written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.metrics import LOG_RECORDS_SUPPRESSED
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records per call site through every `interval` seconds.
+
+    The first record of the next window reports how many were dropped, and
+    every drop is counted in LOG_RECORDS_SUPPRESSED, so floods (e.g. a Redis
+    outage warning on every request) stay visible without flooding the
+    handler. Records at `exempt_level` or above and the exempt loggers (the
+    access log, where every line is a different request) are never dropped.
+    """
+
+    def __init__(
+        self,
+        burst: int,
+        interval: float,
+        exempt_level: int = logging.ERROR,
+        exempt_loggers: Iterable[str] = ("uvicorn.access",)
+    ):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.exempt_level = exempt_level
+        self.exempt_loggers = frozenset(exempt_loggers)
+        # (logger name, line) -> [window start, records passed, records dropped]
+        self._windows: Dict[tuple, List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno >= self.exempt_level or record.name in self.exempt_loggers:
+            return True
+
+        key = (record.name, record.lineno)
+        window = self._windows.get(key)
+        if window is None or record.created - window[0] >= self.interval:
+            if window and window[2]:
+                record.msg = f"{record.msg} [{window[2]} similar messages suppressed]"
+            self._windows[key] = [record.created, 1, 0]
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        LOG_RECORDS_SUPPRESSED.labels(logger=record.name).inc()
+        return False
+
+def configure_logging():
+    """Route all records through a queue so handler I/O runs on a listener thread, not the event loop.
+
+    Safe to call more than once; after a fork (Celery prefork children) the
+    listener thread is started again in the new process.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_BURST, settings.LOG_RATE_LIMIT_INTERVAL))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    # uvicorn installs its own synchronous stream handlers; send those records through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = []
+        server_logger.propagate = True
+
+    # httpx logs every upstream request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
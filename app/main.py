@@ -1,21 +1,52 @@
+from fastapi import FastAPI, Response
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import logging
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
 
-from app.database import create_tables
+from app.config import settings
+from app.database import AsyncSessionLocal, init_schema
 from app.api.stock import router as stocks_router
-from app.middleware import ErrorHandlingMiddleware
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from app.api.symbols import router as symbols_router
+from app.api.portfolio import router as portfolio_router
+from app.api.screener import router as screener_router
+from app.api.export import router as export_router
+from app.repositories.stock import StockRepository
+from app.services.stock import write_quote_snapshot
+from app.symbols import symbol_index
+from app.middleware import (
+    ErrorHandlingMiddleware,
+    ProfilingMiddleware,
+    ServerTimingMiddleware,
+    register_exception_handlers,
 )
+from app.metrics import render_metrics
+from app.logging_config import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+async def refresh_quote_snapshot(interval: float):
+    """Keep the local quote snapshot current so it is ready before Redis fails"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await write_quote_snapshot(StockRepository(db))
+        except Exception as e:
+            logger.error(f"Failed to write quote snapshot: {e}")
+        await asyncio.sleep(interval)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_tables()
+    await init_schema()
+    symbol_index.load()
+    snapshot_task = None
+    if settings.QUOTE_SNAPSHOT_INTERVAL > 0:
+        snapshot_task = asyncio.create_task(refresh_quote_snapshot(settings.QUOTE_SNAPSHOT_INTERVAL))
     yield
-    pass
+    if snapshot_task:
+        snapshot_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await snapshot_task
 
 app = FastAPI(
     title="Stocks REST API",
@@ -24,14 +55,27 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Last added runs first: errors are handled outermost, profiling wraps only the app
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(ErrorHandlingMiddleware)
+register_exception_handlers(app)
 
 app.include_router(stocks_router)
+app.include_router(symbols_router)
+app.include_router(portfolio_router)
+app.include_router(screener_router)
+app.include_router(export_router)
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "service": "stocks-api"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
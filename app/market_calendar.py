@@ -0,0 +1,129 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import FrozenSet, Optional
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+# Polygon publishes the daily bar shortly after the close; until then it is not final
+SETTLE_DELAY = timedelta(minutes=15)
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th weekday (Mon=0) of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=16)
+def market_holidays(year: int) -> FrozenSet[date]:
+    """Full-day NYSE closures for a year"""
+    new_year = date(year, 1, 1)
+    holidays = {
+        # A Saturday New Year's Day is not observed on the preceding Friday
+        new_year + timedelta(days=1) if new_year.weekday() == 6 else new_year,
+        _nth_weekday(year, 1, 0, 3),
+        _nth_weekday(year, 2, 0, 3),
+        _easter(year) - timedelta(days=2),
+        _nth_weekday(year, 5, 0, -1),
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),
+        _nth_weekday(year, 11, 3, 4),
+        _observed(date(year, 12, 25)),
+    }
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))
+    return frozenset(holidays)
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in market_holidays(day.year)
+
+def previous_trading_day(day: date) -> date:
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+def next_trading_day(day: date) -> date:
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+def _market_now(now: Optional[datetime] = None) -> datetime:
+    if now is None:
+        return datetime.now(MARKET_TZ)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return now.astimezone(MARKET_TZ)
+
+def _session_bounds(day: date):
+    return (
+        datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ),
+        datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ),
+    )
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    now = _market_now(now)
+    if not is_trading_day(now.date()):
+        return False
+    open_at, close_at = _session_bounds(now.date())
+    return open_at <= now < close_at
+
+def latest_completed_session(now: Optional[datetime] = None) -> date:
+    """Date of the most recent session whose daily bar is final"""
+    now = _market_now(now)
+    today = now.date()
+    if is_trading_day(today) and now >= _session_bounds(today)[1] + SETTLE_DELAY:
+        return today
+    return previous_trading_day(today)
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    now = _market_now(now)
+    today = now.date()
+    if is_trading_day(today) and now < _session_bounds(today)[0]:
+        return _session_bounds(today)[0]
+    return _session_bounds(next_trading_day(today))[0]
+
+def is_session_final(now: Optional[datetime] = None) -> bool:
+    """True when no quote can change before the next open"""
+    now = _market_now(now)
+    if is_market_open(now):
+        return False
+    today = now.date()
+    if is_trading_day(today):
+        close_at = _session_bounds(today)[1]
+        return not (close_at <= now < close_at + SETTLE_DELAY)
+    return True
+
+def cache_ttl(bar_date: Optional[str], now: Optional[datetime] = None) -> int:
+    """Hold an entry until the next open only if it holds the latest final bar; otherwise use the short TTL"""
+    now = _market_now(now)
+    if not is_session_final(now) or bar_date != latest_completed_session(now).isoformat():
+        return settings.CACHE_TTL
+    return max(settings.CACHE_TTL, int((next_session_open(now) - now).total_seconds()))
@@ -0,0 +1,84 @@
+import functools
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+# Metrics are shared across uvicorn/Celery processes when PROMETHEUS_MULTIPROC_DIR
+# points at a directory that is emptied before the processes start.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+CACHE_OPERATION_SECONDS = Histogram(
+    "cache_operation_duration_seconds", "Redis cache operation latency",
+    ["operation"], buckets=LATENCY_BUCKETS
+)
+STOCK_CACHE_LOOKUPS = Counter(
+    "stock_cache_lookups_total", "Stock cache lookups by result (hit, negative_hit, miss, error)",
+    ["result"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "StockRepository query latency",
+    ["operation"], buckets=LATENCY_BUCKETS
+)
+LOG_RECORDS_SUPPRESSED = Counter(
+    "log_records_suppressed_total", "Log records dropped by the per-call-site rate limit",
+    ["logger"]
+)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds", "External API call latency",
+    ["service", "status"], buckets=LATENCY_BUCKETS
+)
+SYNC_DURATION_SECONDS = Histogram(
+    "stock_sync_duration_seconds", "Duration of a Celery stock sync run",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
+def timed(histogram: Histogram, **labels):
+    """Observe the wall time of an async callable; labels are bound once at decoration time"""
+    child = histogram.labels(**labels) if labels else histogram
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def metrics_registry() -> CollectorRegistry:
+    """This process's registry, or one aggregating every process's files in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+def start_metrics_server(port: int):
+    """Serve /metrics on its own port for processes without the API, i.e. the Celery worker"""
+    start_http_server(port, registry=metrics_registry())
+
+def mark_process_dead(pid: int):
+    """Drop an exited process's live gauges in multiprocess mode; its counters and histograms keep counting"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -1,44 +1,162 @@
+import hmac
 import logging
+import time
 import traceback
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.config import settings
 from app.exceptions import StockAPIException
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.tracing import server_timing, start_recording, stop_recording
 
 logger = logging.getLogger(__name__)
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+def error_response(status_code: int, message: str, error_type: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": True,
+            "message": message,
+            "type": error_type
+        }
+    )
+
+async def stock_api_exception_handler(request: Request, exc: StockAPIException) -> JSONResponse:
+    # Client errors are routine (unknown or mistyped symbols); logging them below ERROR keeps them rate-limited
+    if exc.status_code < 500:
+        logger.info(f"Stock API client error {exc.status_code}: {exc.message}")
+    else:
+        logger.error(f"Stock API error: {exc.message}")
+    return error_response(exc.status_code, exc.message, exc.__class__.__name__)
+
+def register_exception_handlers(app: FastAPI):
+    app.add_exception_handler(StockAPIException, stock_api_exception_handler)
+
+class ErrorHandlingMiddleware:
+    """Pure ASGI middleware that times each request and turns unhandled errors into the JSON error contract.
+
+    Unlike BaseHTTPMiddleware it passes messages straight through, so it adds no
+    extra task per request and leaves streaming responses untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response_started = False
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal response_started, status_code
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{(time.perf_counter() - start) * 1000:.2f}")
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
-        except StockAPIException as e:
-            logger.error(f"Stock API error: {e.message}")
-            return JSONResponse(
-                status_code=e.status_code,
-                content={
-                    "error": True,
-                    "message": e.message,
-                    "type": e.__class__.__name__
-                }
-            )
-        except HTTPException as e:
-            return JSONResponse(
-                status_code=e.status_code,
-                content={
-                    "error": True,
-                    "message": e.detail,
-                    "type": "HTTPException"
-                }
-            )
+            await self.app(scope, receive, send_with_timing)
         except Exception as e:
+            if response_started:
+                raise
             logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "error": True,
-                    "message": "Internal server error",
-                    "type": "InternalServerError"
-                }
-            )
\ No newline at end of file
+            response = error_response(500, "Internal server error", "InternalServerError")
+            await response(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Label by route template, not raw path, to keep series cardinality bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code)
+            ).observe(elapsed)
+            logger.debug("%s %s -> %s in %.2f ms", scope["method"], scope["path"], status_code, elapsed * 1000)
+
+
+class ServerTimingMiddleware:
+    """Collects app.tracing spans for each request and reports them in a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        spans, token = start_recording()
+
+        async def send_with_server_timing(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(spans, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            stop_recording(token)
+
+class ProfilingMiddleware:
+    """Replaces the response with a sampling-profiler report for one request.
+
+    Requires ``X-Profile: html|text`` together with ``X-Admin-Token`` matching
+    settings.ADMIN_TOKEN. Without a configured token the middleware only
+    forwards the request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        output = self._requested_output(scope) if scope["type"] == "http" and settings.ADMIN_TOKEN else None
+        if output is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("Profiling requested but pyinstrument is not installed")
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message: Message):
+            pass
+
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        if output == "text":
+            response = PlainTextResponse(profiler.output_text(unicode=True, show_all=False))
+        else:
+            response = HTMLResponse(profiler.output_html())
+        await response(scope, receive, send)
+
+    def _requested_output(self, scope: Scope):
+        output = token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                output = value.decode("latin-1").lower()
+            elif name == b"x-admin-token":
+                token = value
+        if output is None or token is None:
+            return None
+        if not hmac.compare_digest(token, settings.ADMIN_TOKEN.encode()):
+            return None
+        return "text" if output == "text" else "html"
\ No newline at end of file
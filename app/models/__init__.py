@@ -1,4 +1,5 @@
 
 from .stock import Stock, Base
+from .performance import StockPerformance
 
-__all__ = ["Stock", "Base"]
\ No newline at end of file
+__all__ = ["Stock", "StockPerformance", "Base"]
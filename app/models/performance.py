@@ -0,0 +1,51 @@
+import re
+from sqlalchemy import Column, Float, String, DateTime, ForeignKey
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.database import Base
+
+# Scraped MarketWatch keys (see MarketWatchService.get_performance_data) -> column
+PERFORMANCE_WINDOWS = {
+    "5_day": "perf_5d",
+    "1_month": "perf_1m",
+    "3_month": "perf_3m",
+    "ytd": "perf_ytd",
+    "1_year": "perf_1y",
+}
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+def parse_percent(value: Any) -> Optional[float]:
+    """Parse scraped text such as "5.23%", "+1,204.5%" or "−0.8%" into a float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = value.replace(",", "").replace("−", "-").replace("–", "-")
+    match = _NUMBER.search(text)
+    return float(match.group()) if match else None
+
+class StockPerformance(Base):
+    __tablename__ = "stock_performance"
+    
+    symbol = Column(String, ForeignKey("stocks.symbol", ondelete="CASCADE"), primary_key=True)
+    
+    # Percent changes, e.g. 5.23 for "5.23%"
+    perf_5d = Column(Float, nullable=True, index=True)
+    perf_1m = Column(Float, nullable=True, index=True)
+    perf_3m = Column(Float, nullable=True, index=True)
+    perf_ytd = Column(Float, nullable=True, index=True)
+    perf_1y = Column(Float, nullable=True, index=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def from_scraped(cls, symbol: str, performance: Dict[str, Any]) -> Optional["StockPerformance"]:
+        # Every window is set so a fresh scrape replaces the previous one as a whole
+        metrics = {
+            column: parse_percent(performance.get(key))
+            for key, column in PERFORMANCE_WINDOWS.items()
+        }
+        if not any(value is not None for value in metrics.values()):
+            return None
+        return cls(symbol=symbol.upper(), **metrics)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, Index
 from datetime import datetime
 from app.database import Base
 
@@ -10,14 +10,14 @@ class Stock(Base):
     
     # Polygon.io data
     after_hours = Column(Float, nullable=True)
-    close = Column(Float, nullable=True)
+    close = Column(Float, nullable=True, index=True)
     from_date = Column(String, nullable=True)
     high = Column(Float, nullable=True)
     low = Column(Float, nullable=True)
     open = Column(Float, nullable=True)
     pre_market = Column(Float, nullable=True)
     status = Column(String, nullable=True)
-    volume = Column(Integer, nullable=True)
+    volume = Column(Integer, nullable=True, index=True)
     
     # MarketWatch data (JSON string)
     performance = Column(String, nullable=True)
@@ -26,4 +26,9 @@ class Stock(Base):
     amount = Column(Integer, default=0)
     
     # Metadata
-    updated_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Held positions only, in symbol order and covering the valuation, so get_positions reads just these rows
+        Index("ix_stocks_held", symbol, amount, close, sqlite_where=amount > 0, postgresql_where=amount > 0),
+    )
\ No newline at end of file
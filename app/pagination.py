@@ -0,0 +1,21 @@
+import base64
+import binascii
+import json
+from typing import Any, List
+
+from app.exceptions import InvalidQueryException
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque, URL-safe token for the position after the last returned row"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidQueryException("malformed cursor")
+    if not isinstance(values, list):
+        raise InvalidQueryException("malformed cursor")
+    return values
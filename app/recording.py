@@ -0,0 +1,167 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_MODES = ("live", "record", "replay")
+# Credentials never reach the corpus; they are also ignored when matching a replayed request
+REDACTED_PARAMS = frozenset({"apikey", "apiKey", "api_key", "token"})
+# The body is stored decoded, so transfer framing headers would be wrong on replay
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"})
+_DATE_SEGMENT = re.compile(r"/\d{4}-\d{2}-\d{2}(?=/|$)")
+
+def request_key(method: str, url: httpx.URL) -> str:
+    params = [(key, value) for key, value in url.params.multi_items() if key not in REDACTED_PARAMS]
+    return f"{method} {url.copy_with(params=params) if params else url.copy_with(query=None)}"
+
+def undated_key(key: str) -> str:
+    """Key with ISO dates in the path wildcarded, so a corpus keeps replaying after the trading day moves on"""
+    return _DATE_SEGMENT.sub("/{date}", key)
+
+class UpstreamCorpus:
+    """Recorded upstream responses in a gzip JSON-lines file, one exchange per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._exact: Dict[str, dict] = {}
+        self._undated: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "UpstreamCorpus":
+        self._exact.clear()
+        self._undated.clear()
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+        logger.info(f"Loaded {len(self._exact)} recorded upstream responses from {self.path}")
+        return self
+
+    def _index(self, entry: dict):
+        # Later recordings win, so re-recording a symbol refreshes it without rewriting the file
+        self._exact[entry["key"]] = entry
+        self._undated[undated_key(entry["key"])] = entry
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def entries(self) -> List[dict]:
+        return list(self._exact.values())
+
+    def lookup(self, key: str) -> Optional[dict]:
+        return self._exact.get(key) or self._undated.get(undated_key(key))
+
+    def append(self, entry: dict):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Each append is its own gzip member; gzip readers concatenate them transparently
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self._index(entry)
+
+def encode_body(content: bytes) -> dict:
+    # HTML and JSON stay readable and compress far better than their base64 form
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(content).decode("ascii")}
+
+def decode_body(entry: dict) -> bytes:
+    if "text" in entry:
+        return entry["text"].encode("utf-8")
+    return base64.b64decode(entry["body"])
+
+def entry_from_response(key: str, response: httpx.Response, content: bytes, elapsed: float) -> dict:
+    """Corpus entry for a response whose decoded body was read separately"""
+    return {
+        "key": key,
+        "status": response.status_code,
+        "headers": [[name, value] for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS],
+        **encode_body(content),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "recorded_at": time.time(),
+    }
+
+def response_from_entry(entry: dict, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        entry["status"],
+        headers=entry["headers"],
+        content=decode_body(entry),
+        request=request,
+    )
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through to the real upstream and appends every response to the corpus"""
+
+    def __init__(self, corpus: UpstreamCorpus, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.corpus = corpus
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - start
+        # aread() has already undone Content-Encoding; the entry drops that header so the body is never decoded twice
+        entry = entry_from_response(request_key(request.method, request.url), response, content, elapsed)
+        await asyncio.to_thread(self.corpus.append, entry)
+        return response_from_entry(entry, request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves the corpus without touching the network, optionally waiting the recorded upstream time"""
+
+    def __init__(self, corpus: UpstreamCorpus, delay_scale: float = 1.0):
+        self.corpus = corpus
+        self.delay_scale = delay_scale
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request.method, request.url)
+        entry = self.corpus.lookup(key)
+        if entry is None:
+            raise httpx.ConnectError(f"No recorded response for {key}", request=request)
+        if self.delay_scale > 0:
+            await asyncio.sleep(entry["elapsed_ms"] / 1000 * self.delay_scale)
+        return response_from_entry(entry, request)
+
+_corpora: Dict[str, UpstreamCorpus] = {}
+
+def upstream_corpus(path: Optional[str] = None) -> UpstreamCorpus:
+    """Process-wide corpus for a path, loaded on first use"""
+    path = path or settings.UPSTREAM_CORPUS
+    corpus = _corpora.get(path)
+    if corpus is None:
+        corpus = _corpora[path] = UpstreamCorpus(path).load()
+    return corpus
+
+def upstream_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for the upstream clients according to UPSTREAM_MODE; None means httpx's default"""
+    mode = settings.UPSTREAM_MODE
+    if mode == "live":
+        return None
+    if mode == "record":
+        return RecordingTransport(upstream_corpus())
+    if mode == "replay":
+        return ReplayTransport(upstream_corpus(), settings.UPSTREAM_REPLAY_DELAY_SCALE)
+    raise ValueError(f"UPSTREAM_MODE must be one of {', '.join(UPSTREAM_MODES)}, got {mode!r}")
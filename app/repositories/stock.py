@@ -1,19 +1,43 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update, tuple_
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime
 import json
 import logging
 
+from app.database import write_transaction
 from app.models.stock import Stock
+from app.models.performance import StockPerformance
 from app.exceptions import StockAPIException
+from app.metrics import DB_QUERY_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
+SCREENER_COLUMNS = {
+    "symbol": Stock.symbol,
+    "price": Stock.close,
+    "volume": Stock.volume,
+    "perf_5d": StockPerformance.perf_5d,
+    "perf_1m": StockPerformance.perf_1m,
+    "perf_3m": StockPerformance.perf_3m,
+    "perf_ytd": StockPerformance.perf_ytd,
+    "perf_1y": StockPerformance.perf_1y,
+}
+
+EXPORT_COLUMNS = (
+    Stock.symbol, Stock.open, Stock.high, Stock.low, Stock.close, Stock.volume,
+    Stock.after_hours, Stock.pre_market, Stock.from_date, Stock.status, Stock.amount, Stock.updated_at,
+    StockPerformance.perf_5d, StockPerformance.perf_1m, StockPerformance.perf_3m,
+    StockPerformance.perf_ytd, StockPerformance.perf_1y,
+)
+
 class StockRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @timed(DB_QUERY_SECONDS, operation="get_by_symbol")
     async def get_by_symbol(self, symbol: str) -> Optional[Stock]:
         try:
             result = await self.db.execute(
@@ -24,54 +48,180 @@ class StockRepository:
             logger.error(f"Database error fetching stock {symbol}: {e}")
             raise StockAPIException(f"Failed to fetch stock {symbol}: {str(e)}")
 
+    @timed(DB_QUERY_SECONDS, operation="create")
     async def create(self, stock_data: dict) -> Stock:
+        async with write_transaction(self.db):
+            try:
+                # Serialise into a copy; callers keep using the dict for the response and cache
+                stock_data = dict(stock_data)
+                performance = stock_data.get('performance')
+                if isinstance(performance, dict):
+                    stock_data['performance'] = json.dumps(performance)
+                
+                stock = Stock(**stock_data)
+                self.db.add(stock)
+                if isinstance(performance, dict):
+                    await self.db.flush()
+                    await self._store_performance(stock.symbol, performance)
+                await self.db.commit()
+                await self.db.refresh(stock)
+                return stock
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                logger.error(f"Database error creating stock: {e}")
+                raise StockAPIException(f"Failed to create stock: {str(e)}")
+
+    @timed(DB_QUERY_SECONDS, operation="update_market_data")
+    async def update_market_data(self, symbol: str, market_data: dict) -> Optional[Stock]:
+        async with write_transaction(self.db):
+            try:
+                logger.debug("Updating market data for %s with %s", symbol, market_data)
+                market_data = dict(market_data)
+                # Quote freshness (the snapshot fallback) is judged by updated_at, so every refresh stamps it
+                market_data.setdefault('updated_at', datetime.utcnow())
+                if 'performance' in market_data and isinstance(market_data['performance'], dict):
+                    await self._store_performance(symbol, market_data['performance'])
+                    market_data['performance'] = json.dumps(market_data['performance'])
+                
+                await self.db.execute(
+                    update(Stock)
+                    .where(Stock.symbol == symbol.upper())
+                    .values(**market_data)
+                )
+                await self.db.commit()
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                logger.error(f"Database error updating market data for {symbol}: {e}")
+                raise StockAPIException(f"Failed to update market data for {symbol}: {str(e)}")
+        return await self.get_by_symbol(symbol)
+
+    @timed(DB_QUERY_SECONDS, operation="update_amount")
+    async def update_amount(self, symbol: str, additional_amount: int) -> Optional[Stock]:
+        async with write_transaction(self.db):
+            try:
+                # Incremented in SQL: reading the amount first loses concurrent additions
+                result = await self.db.execute(
+                    update(Stock)
+                    .where(Stock.symbol == symbol.upper())
+                    .values(amount=func.coalesce(Stock.amount, 0) + additional_amount)
+                )
+                await self.db.commit()
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                logger.error(f"Database error updating amount for {symbol}: {e}")
+                raise StockAPIException(f"Failed to update amount for {symbol}: {str(e)}")
+        if not result.rowcount:
+            return None
+        return await self.get_by_symbol(symbol)
+
+    @timed(DB_QUERY_SECONDS, operation="get_quotes")
+    async def get_quotes(self) -> List[Stock]:
+        """Stocks that have market data, for the quote snapshot"""
         try:
-            if 'performance' in stock_data and isinstance(stock_data['performance'], dict):
-                stock_data['performance'] = json.dumps(stock_data['performance'])
-            
-            stock = Stock(**stock_data)
-            self.db.add(stock)
-            await self.db.commit()
-            await self.db.refresh(stock)
-            return stock
+            result = await self.db.execute(select(Stock).where(Stock.close.is_not(None)))
+            return list(result.scalars().all())
         except SQLAlchemyError as e:
-            await self.db.rollback()
-            logger.error(f"Database error creating stock: {e}")
-            raise StockAPIException(f"Failed to create stock: {str(e)}")
+            logger.error(f"Database error fetching quotes: {e}")
+            raise StockAPIException(f"Failed to fetch quotes: {str(e)}")
 
-    async def update_market_data(self, symbol: str, market_data: dict) -> Optional[Stock]:
+    @timed(DB_QUERY_SECONDS, operation="get_positions")
+    async def get_positions(self) -> List[Row]:
+        """Held symbols with their latest close and position value, in a single query"""
         try:
-            logger.info(f"Updating market data for {symbol} with {market_data}")
-            if 'performance' in market_data and isinstance(market_data['performance'], dict):
-                market_data['performance'] = json.dumps(market_data['performance'])
-            
-            await self.db.execute(
-                update(Stock)
-                .where(Stock.symbol == symbol.upper())
-                .values(**market_data)
+            result = await self.db.execute(
+                select(
+                    Stock.symbol,
+                    Stock.amount,
+                    Stock.close,
+                    (Stock.amount * Stock.close).label("value")
+                )
+                .where(Stock.amount > 0)
+                .order_by(Stock.symbol)
             )
-            await self.db.commit()
-            return await self.get_by_symbol(symbol)
+            return result.all()
         except SQLAlchemyError as e:
-            await self.db.rollback()
-            logger.error(f"Database error updating market data for {symbol}: {e}")
-            raise StockAPIException(f"Failed to update market data for {symbol}: {str(e)}")
+            logger.error(f"Database error fetching positions: {e}")
+            raise StockAPIException(f"Failed to fetch positions: {str(e)}")
 
-    async def update_amount(self, symbol: str, additional_amount: int) -> Optional[Stock]:
+    @timed(DB_QUERY_SECONDS, operation="screen")
+    async def screen(
+        self,
+        filters: Dict[str, Tuple[Optional[float], Optional[float]]],
+        sort: str = "symbol",
+        descending: bool = False,
+        limit: int = 50,
+        after: Optional[Tuple] = None
+    ) -> List[Row]:
+        """Filter and sort on indexed market and performance columns with keyset pagination.
+
+        ``after`` is the (sort value, symbol) pair of the last row of the previous page.
+        """
+        sort_column = SCREENER_COLUMNS[sort]
+        query = (
+            select(Stock.symbol, Stock.close, Stock.volume, *(
+                column for name, column in SCREENER_COLUMNS.items() if name.startswith("perf_")
+            ))
+            .outerjoin(StockPerformance, StockPerformance.symbol == Stock.symbol)
+            .where(sort_column.is_not(None))
+        )
+        for name, (minimum, maximum) in filters.items():
+            column = SCREENER_COLUMNS[name]
+            if minimum is not None:
+                query = query.where(column >= minimum)
+            if maximum is not None:
+                query = query.where(column <= maximum)
+        
+        key = tuple_(sort_column, Stock.symbol)
+        if after is not None:
+            query = query.where(key < tuple(after) if descending else key > tuple(after))
+        if descending:
+            query = query.order_by(sort_column.desc(), Stock.symbol.desc())
+        else:
+            query = query.order_by(sort_column, Stock.symbol)
+        
         try:
-            stock = await self.get_by_symbol(symbol)
-            if not stock:
-                return None
-            
-            new_amount = stock.amount + additional_amount
-            await self.db.execute(
-                update(Stock)
-                .where(Stock.symbol == symbol.upper())
-                .values(amount=new_amount)
-            )
-            await self.db.commit()
-            return await self.get_by_symbol(symbol)
+            result = await self.db.execute(query.limit(limit))
+            return result.all()
         except SQLAlchemyError as e:
-            await self.db.rollback()
-            logger.error(f"Database error updating amount for {symbol}: {e}")
-            raise StockAPIException(f"Failed to update amount for {symbol}: {str(e)}")
\ No newline at end of file
+            logger.error(f"Database error screening stocks: {e}")
+            raise StockAPIException(f"Failed to screen stocks: {str(e)}")
+
+    @timed(DB_QUERY_SECONDS, operation="export_chunk")
+    async def export_chunk(self, after: Optional[str] = None, limit: int = 1000) -> List[Row]:
+        """Up to ``limit`` stocks with their typed performance, in symbol order, after that symbol"""
+        query = (
+            select(*EXPORT_COLUMNS)
+            .outerjoin(StockPerformance, StockPerformance.symbol == Stock.symbol)
+            .order_by(Stock.symbol)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Stock.symbol > after)
+        
+        try:
+            result = await self.db.execute(query)
+            return result.all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error exporting stocks: {e}")
+            raise StockAPIException(f"Failed to export stocks: {str(e)}")
+
+    async def iter_export(self, after: Optional[str] = None, chunk_size: int = 1000) -> AsyncIterator[List[Row]]:
+        """Every stock in symbol order, as keyset chunks of ``chunk_size``; ``after`` resumes after that symbol.
+
+        Each chunk is read in its own short transaction, so a slow client never
+        holds SQLite's read lock against writers such as the Celery sync.
+        """
+        while True:
+            rows = await self.export_chunk(after, chunk_size)
+            await self.db.commit()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1].symbol
+
+    async def _store_performance(self, symbol: str, performance: dict):
+        metrics = StockPerformance.from_scraped(symbol, performance)
+        if metrics is not None:
+            await self.db.merge(metrics)
\ No newline at end of file
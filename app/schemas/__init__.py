@@ -1,3 +1,17 @@
 from .stock import StockBase, StockCreate, StockUpdate, StockResponse
+from .symbol import SymbolResponse
+from .portfolio import PositionResponse, PortfolioResponse
+from .screener import ScreenerQuery, ScreenerRow, ScreenerResponse
 
-__all__ = ["StockBase", "StockCreate", "StockUpdate", "StockResponse"]
\ No newline at end of file
+__all__ = [
+    "StockBase",
+    "StockCreate",
+    "StockUpdate",
+    "StockResponse",
+    "SymbolResponse",
+    "PositionResponse",
+    "PortfolioResponse",
+    "ScreenerQuery",
+    "ScreenerRow",
+    "ScreenerResponse",
+]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class PositionResponse(BaseModel):
+    symbol: str
+    amount: int
+    close: Optional[float] = None
+    value: Optional[float] = Field(None, description="amount * close, null until a price is known")
+
+class PortfolioResponse(BaseModel):
+    positions: List[PositionResponse]
+    position_count: int
+    total_value: float = Field(..., description="Sum of all priced positions")
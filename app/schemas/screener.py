@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+ScreenerSort = Literal["symbol", "price", "volume", "perf_5d", "perf_1m", "perf_3m", "perf_ytd", "perf_1y"]
+
+class ScreenerQuery(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_volume: Optional[int] = Field(None, ge=0)
+    max_volume: Optional[int] = Field(None, ge=0)
+    min_perf_5d: Optional[float] = None
+    max_perf_5d: Optional[float] = None
+    min_perf_1m: Optional[float] = None
+    max_perf_1m: Optional[float] = None
+    min_perf_3m: Optional[float] = None
+    max_perf_3m: Optional[float] = None
+    min_perf_ytd: Optional[float] = None
+    max_perf_ytd: Optional[float] = None
+    min_perf_1y: Optional[float] = None
+    max_perf_1y: Optional[float] = None
+    sort: ScreenerSort = "symbol"
+    order: Literal["asc", "desc"] = "asc"
+    limit: int = Field(50, ge=1, le=500)
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page")
+
+class ScreenerRow(BaseModel):
+    symbol: str
+    close: Optional[float] = None
+    volume: Optional[int] = None
+    perf_5d: Optional[float] = Field(None, description="5 day change in percent")
+    perf_1m: Optional[float] = None
+    perf_3m: Optional[float] = None
+    perf_ytd: Optional[float] = None
+    perf_1y: Optional[float] = None
+
+class ScreenerResponse(BaseModel):
+    items: List[ScreenerRow]
+    next_cursor: Optional[str] = None
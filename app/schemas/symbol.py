@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+class SymbolResponse(BaseModel):
+    symbol: str = Field(..., description="Stock symbol (e.g., AAPL)")
+    name: str = Field("", description="Company or instrument name")
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy.engine import Row
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.repositories.stock import EXPORT_COLUMNS, StockRepository
+from app.pagination import decode_cursor, encode_cursor
+from app.exceptions import InvalidQueryException
+
+logger = logging.getLogger(__name__)
+
+# Every record carries the token that resumes the export right after it
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS] + ["cursor"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+class ExportService:
+    """Streams the full stock table; runs in its own session because the response outlives the request handler"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, chunk_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    @staticmethod
+    def resume_after(cursor: Optional[str]) -> Optional[str]:
+        """Symbol to resume after; validated before streaming so a bad token is still a clean 400"""
+        if not cursor:
+            return None
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], str):
+            raise InvalidQueryException("malformed cursor")
+        return values[0]
+
+    async def stream(self, format: str = "ndjson", after: Optional[str] = None, compress: bool = False) -> AsyncIterator[bytes]:
+        # Sync-flushing each chunk keeps an interrupted gzip transfer decodable up to its last full chunk
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        rows_sent = 0
+        async with self.session_factory() as db:
+            repository = StockRepository(db)
+            if format == "csv":
+                yield self._encode(compressor, ",".join(EXPORT_FIELDS) + "\r\n")
+            async for rows in repository.iter_export(after, self.chunk_size):
+                records = [self._record(row) for row in rows]
+                chunk = self._csv(records) if format == "csv" else self._ndjson(records)
+                yield self._encode(compressor, chunk)
+                rows_sent += len(records)
+        if compressor is not None:
+            yield compressor.flush()
+        logger.info(f"Exported {rows_sent} stocks as {format}")
+
+    @staticmethod
+    def _record(row: Row) -> Dict:
+        record = dict(row._mapping)
+        if record["updated_at"] is not None:
+            record["updated_at"] = record["updated_at"].isoformat()
+        record["cursor"] = encode_cursor([record["symbol"]])
+        return record
+
+    @staticmethod
+    def _ndjson(records: List[Dict]) -> str:
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+
+    @staticmethod
+    def _csv(records: List[Dict]) -> str:
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS).writerows(records)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _encode(compressor, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
@@ -1,19 +1,32 @@
 import httpx
-from bs4 import BeautifulSoup
 import logging
+import time
 from typing import Optional, Dict, Any
 import re
 
 from app.config import settings
-from app.exceptions import ExternalAPIException
+from app.metrics import UPSTREAM_REQUEST_SECONDS
+from app.recording import upstream_transport
+from app.tracing import span
+from app.exceptions import ExternalAPIException, ExternalNotFoundException
 
 logger = logging.getLogger(__name__)
 
 class MarketWatchService:
     def __init__(self):
         self.base_url = settings.MARKETWATCH_BASE_URL
-        self.client = httpx.AsyncClient(
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
             timeout=30.0,
+            transport=upstream_transport(),
             headers={
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -29,32 +42,17 @@ class MarketWatchService:
 
     async def get_performance_data(self, symbol: str) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}/{symbol.lower()}"
+        start = time.perf_counter()
+        status = "error"
         
         try:
-            response = await self.client.get(url)
+            with span("marketwatch"):
+                response = await self.client.get(url)
+            status = str(response.status_code)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            performance_data = {}
-            
-            performance_section = soup.find('div', {'class': re.compile(r'.*performance.*', re.I)})
-            
-            if not performance_section:
-                tables = soup.find_all('table')
-                for table in tables:
-                    if 'performance' in str(table).lower():
-                        performance_section = table
-                        break
-            
-            if performance_section:
-                rows = performance_section.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        key = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
-                        key = re.sub(r'[^\w\s]', '', key).replace(' ', '_').lower()
-                        performance_data[key] = value
+            with span("parse"):
+                performance_data = self.parse_performance(response.content)
             
             if not performance_data:
                 logger.warning(f"No performance data found for {symbol}")
@@ -64,14 +62,46 @@ class MarketWatchService:
             
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                raise ExternalAPIException("MarketWatch", f"Stock {symbol} not found")
+                raise ExternalNotFoundException("MarketWatch", symbol)
             else:
                 raise ExternalAPIException("MarketWatch", f"HTTP {e.response.status_code}")
         except httpx.RequestError as e:
+            status = "network_error"
             raise ExternalAPIException("MarketWatch", f"Network error: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error in MarketWatch service: {e}")
             raise ExternalAPIException("MarketWatch", "Unexpected error occurred")
+        finally:
+            UPSTREAM_REQUEST_SECONDS.labels(service="marketwatch", status=status).observe(time.perf_counter() - start)
+
+    @staticmethod
+    def parse_performance(html: bytes) -> Dict[str, str]:
+        # Imported on first parse: bs4 is a large share of API import time and cache hits never need it
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        performance_data = {}
+        
+        performance_section = soup.find('div', {'class': re.compile(r'.*performance.*', re.I)})
+        
+        if not performance_section:
+            tables = soup.find_all('table')
+            for table in tables:
+                if 'performance' in str(table).lower():
+                    performance_section = table
+                    break
+        
+        if performance_section:
+            rows = performance_section.find_all('tr')
+            for row in rows:
+                cells = row.find_all(['td', 'th'])
+                if len(cells) >= 2:
+                    key = cells[0].get_text(strip=True)
+                    value = cells[1].get_text(strip=True)
+                    key = re.sub(r'[^\w\s]', '', key).replace(' ', '_').lower()
+                    performance_data[key] = value
+        
+        return performance_data
 
     async def close(self):
-        await self.client.aclose()
\ No newline at end of file
+        if self._client is not None:
+            await self._client.aclose()
\ No newline at end of file
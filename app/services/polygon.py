@@ -1,10 +1,14 @@
 import httpx
 import logging
-from datetime import datetime
+import time
 from typing import Optional, Dict, Any
 
+from app import market_calendar
 from app.config import settings
-from app.exceptions import ExternalAPIException
+from app.metrics import UPSTREAM_REQUEST_SECONDS
+from app.recording import upstream_transport
+from app.tracing import span
+from app.exceptions import ExternalAPIException, ExternalNotFoundException
 
 logger = logging.getLogger(__name__)
 
@@ -12,17 +16,28 @@ class PolygonService:
     def __init__(self):
         self.base_url = settings.POLYGON_URL
         self.api_key = settings.POLYGON_API_KEY
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Building a client loads the TLS trust store, so cache hits should never pay for it
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30.0, transport=upstream_transport())
+        return self._client
 
     async def get_daily_open_close(self, symbol: str, date: str = None) -> Optional[Dict[str, Any]]:
         if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+            date = market_calendar.latest_completed_session().isoformat()
         
         url = f"{self.base_url}/{symbol.upper()}/{date}"
         params = {"apikey": self.api_key}
+        start = time.perf_counter()
+        status = "error"
         
         try:
-            response = await self.client.get(url, params=params)
+            with span("polygon"):
+                response = await self.client.get(url, params=params)
+            status = str(response.status_code)
             response.raise_for_status()
             
             data = response.json()
@@ -47,16 +62,22 @@ class PolygonService:
             
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                raise ExternalAPIException("Polygon", f"Stock {symbol} not found")
+                raise ExternalNotFoundException("Polygon", symbol)
             elif e.response.status_code == 429:
                 raise ExternalAPIException("Polygon", "Rate limit exceeded")
             else:
                 raise ExternalAPIException("Polygon", f"HTTP {e.response.status_code}")
         except httpx.RequestError as e:
+            status = "network_error"
             raise ExternalAPIException("Polygon", f"Network error: {str(e)}")
+        except ExternalAPIException:
+            raise
         except Exception as e:
             logger.error(f"Unexpected error in Polygon service: {e}")
             raise ExternalAPIException("Polygon", "Unexpected error occurred")
+        finally:
+            UPSTREAM_REQUEST_SECONDS.labels(service="polygon", status=status).observe(time.perf_counter() - start)
 
     async def close(self):
-        await self.client.aclose()
\ No newline at end of file
+        if self._client is not None:
+            await self._client.aclose()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import logging
+from typing import Optional
+
+from app.repositories.stock import StockRepository
+from app.schemas.portfolio import PortfolioResponse, PositionResponse
+from app.cache import CacheService, cache_service
+from app.config import settings
+from app.exceptions import CacheException
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_CACHE_KEY = "portfolio"
+
+async def invalidate_portfolio(cache: Optional[CacheService] = None):
+    """Drop the cached valuation after a holding or a held symbol's price changed"""
+    try:
+        await (cache or cache_service).delete(PORTFOLIO_CACHE_KEY)
+    except CacheException as e:
+        logger.warning(f"Portfolio cache invalidation failed: {e.message}")
+
+class PortfolioService:
+    def __init__(self, repository: StockRepository):
+        self.repository = repository
+
+    async def get_portfolio(self) -> PortfolioResponse:
+        try:
+            cached_data = await cache_service.get(PORTFOLIO_CACHE_KEY)
+            if cached_data:
+                return PortfolioResponse(**cached_data)
+        except CacheException as e:
+            logger.warning(f"Portfolio cache read failed: {e.message}")
+
+        positions = [
+            PositionResponse(symbol=row.symbol, amount=row.amount, close=row.close, value=row.value)
+            for row in await self.repository.get_positions()
+        ]
+        portfolio = PortfolioResponse(
+            positions=positions,
+            position_count=len(positions),
+            total_value=sum(position.value for position in positions if position.value is not None)
+        )
+
+        try:
+            # invalidate_portfolio drops the entry on every change; the TTL bounds how long a valuation
+            # written after a concurrent invalidation can outlive it
+            await cache_service.set(PORTFOLIO_CACHE_KEY, portfolio.model_dump(), ttl=settings.CACHE_TTL)
+        except CacheException as e:
+            logger.warning(f"Portfolio cache write failed: {e.message}")
+
+        return portfolio
@@ -0,0 +1,55 @@
+import logging
+from typing import Any, Tuple
+
+from app.repositories.stock import StockRepository
+from app.schemas.screener import ScreenerQuery, ScreenerResponse, ScreenerRow
+from app.pagination import decode_cursor, encode_cursor
+from app.exceptions import InvalidQueryException
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ("price", "volume", "perf_5d", "perf_1m", "perf_3m", "perf_ytd", "perf_1y")
+
+def cursor_after(cursor: str, sort: str) -> Tuple[Any, str]:
+    """(sort value, symbol) from a next_cursor; the types are checked here so a forged token never reaches SQL"""
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[1], str):
+        raise InvalidQueryException("malformed cursor")
+    sort_value = values[0]
+    if sort == "symbol":
+        valid = isinstance(sort_value, str)
+    else:
+        valid = isinstance(sort_value, (int, float)) and not isinstance(sort_value, bool)
+    if not valid:
+        raise InvalidQueryException("malformed cursor")
+    return sort_value, values[1]
+
+class ScreenerService:
+    def __init__(self, repository: StockRepository):
+        self.repository = repository
+
+    async def screen(self, query: ScreenerQuery) -> ScreenerResponse:
+        filters = {}
+        for field in FILTER_FIELDS:
+            bounds = (getattr(query, f"min_{field}"), getattr(query, f"max_{field}"))
+            if bounds != (None, None):
+                filters[field] = bounds
+
+        after = cursor_after(query.cursor, query.sort) if query.cursor else None
+
+        rows = await self.repository.screen(
+            filters,
+            sort=query.sort,
+            descending=query.order == "desc",
+            limit=query.limit + 1,
+            after=after
+        )
+        items = [ScreenerRow(**row._mapping) for row in rows[:query.limit]]
+
+        next_cursor = None
+        if len(rows) > query.limit:
+            last = items[-1]
+            sort_value = last.close if query.sort == "price" else getattr(last, query.sort)
+            next_cursor = encode_cursor([sort_value, last.symbol])
+
+        return ScreenerResponse(items=items, next_cursor=next_cursor)
@@ -1,14 +1,29 @@
 import asyncio
 import logging
 import json
+from datetime import datetime, timedelta
 from typing import Optional
 
 from app.repositories.stock import StockRepository
 from app.services.polygon import PolygonService
 from app.services.marketwatch import MarketWatchService
+from app.services.portfolio import invalidate_portfolio
 from app.schemas.stock import StockResponse
+from app import market_calendar
 from app.cache import cache_service
-from app.exceptions import StockNotFoundException, ExternalAPIException, CacheException
+from app.snapshot import quote_snapshot, write_snapshot
+from app.config import settings
+from app.metrics import STOCK_CACHE_LOOKUPS
+from app.tracing import span
+from app.symbols import is_valid_symbol, normalize_symbol, symbol_index
+from app.exceptions import (
+    StockNotFoundException,
+    ExternalAPIException,
+    ExternalNotFoundException,
+    CacheException,
+    InvalidSymbolException,
+    StockAPIException,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,23 +34,50 @@ class StockService:
         self.marketwatch_service = MarketWatchService()
 
     async def get_stock(self, symbol: str) -> Optional[StockResponse]:
-        cache_key = f"stock:{symbol.upper()}"
+        if not is_valid_symbol(symbol):
+            raise InvalidSymbolException(symbol)
+        # Cache keys, the stored row and the upstream URLs all use the form that was validated
+        symbol = normalize_symbol(symbol)
+        cache_key = f"stock:{symbol}"
+        missing_key = f"stock:missing:{symbol}"
         
         try:
-            cached_data = await cache_service.get(cache_key)
+            with span("cache"):
+                cached_data, missing = await cache_service.get_many([cache_key, missing_key])
             if cached_data:
-                logger.info(f"Cache hit for {symbol}")
-                stock = await self.repository.get_by_symbol(symbol)
+                STOCK_CACHE_LOOKUPS.labels(result="hit").inc()
+                logger.debug("Cache hit for %s", symbol)
+                with span("db"):
+                    stock = await self.repository.get_by_symbol(symbol)
                 cached_data['amount'] = stock.amount if stock else 0
                 cached_data['performance'] = json.loads(cached_data['performance']) if 'performance' in cached_data and isinstance(cached_data['performance'], str) else cached_data.get('performance', {})
                 return StockResponse(**cached_data)
+            if missing:
+                STOCK_CACHE_LOOKUPS.labels(result="negative_hit").inc()
+                logger.debug("Negative cache hit for %s", symbol)
+                raise StockNotFoundException(symbol)
+            STOCK_CACHE_LOOKUPS.labels(result="miss").inc()
         except CacheException as e:
+            STOCK_CACHE_LOOKUPS.labels(result="error").inc()
             logger.warning(f"Cache read failed for {symbol}: {e.message}")
+            # Without Redis, recent quotes come from the local snapshot instead of both upstreams
+            with span("snapshot"):
+                snapshot_response = await self._from_snapshot(symbol)
+            if snapshot_response:
+                return snapshot_response
 
-        stock = await self.repository.get_by_symbol(symbol)
+        with span("db"):
+            stock = await self.repository.get_by_symbol(symbol)
+        # The reference index only saves upstream calls; a symbol already held or stored is served regardless
+        if not stock:
+            await symbol_index.refresh()
+            if symbol_index.loaded and not symbol_index.contains(symbol):
+                raise StockNotFoundException(symbol)
         
         polygon_data = None
         performance_data = {}
+        polygon_error = None
+        marketwatch_error = None
         
         try:
             polygon_task = self.polygon_service.get_daily_open_close(symbol)
@@ -45,28 +87,41 @@ class StockService:
                 polygon_task, marketwatch_task, return_exceptions=True
             )
 
-            if isinstance(polygon_data, ExternalAPIException):
+            if isinstance(polygon_data, ExternalNotFoundException):
+                logger.info(f"Polygon has no data for {symbol}")
+                polygon_error, polygon_data = polygon_data, None
+            elif isinstance(polygon_data, ExternalAPIException):
                 logger.error(f"Polygon service failed for {symbol}: {polygon_data.message}")
-                polygon_data = None
+                polygon_error, polygon_data = polygon_data, None
             elif isinstance(polygon_data, Exception):
                 logger.error(f"Unexpected Polygon error for {symbol}: {polygon_data}")
-                polygon_data = None
+                polygon_error, polygon_data = polygon_data, None
             
-            if isinstance(performance_data, ExternalAPIException):
+            if isinstance(performance_data, ExternalNotFoundException):
+                logger.info(f"MarketWatch has no data for {symbol}")
+                marketwatch_error, performance_data = performance_data, {}
+            elif isinstance(performance_data, ExternalAPIException):
                 logger.error(f"MarketWatch service failed for {symbol}: {performance_data.message}")
-                performance_data = {}
+                marketwatch_error, performance_data = performance_data, {}
             elif isinstance(performance_data, Exception):
                 logger.error(f"Unexpected MarketWatch error for {symbol}: {performance_data}")
-                performance_data = {}
+                marketwatch_error, performance_data = performance_data, {}
                 
         except Exception as e:
             logger.error(f"Unexpected error fetching external data for {symbol}: {e}")
         
         if not polygon_data and not stock:
+            if isinstance(polygon_error, ExternalNotFoundException) and isinstance(marketwatch_error, ExternalNotFoundException):
+                await self._cache_missing(symbol, missing_key)
+            elif polygon_error is not None and not isinstance(polygon_error, ExternalNotFoundException):
+                # An upstream outage says nothing about the symbol, so it is surfaced as-is and never cached
+                if isinstance(polygon_error, ExternalAPIException):
+                    raise polygon_error
+                raise ExternalAPIException("Polygon", "Unexpected error occurred")
             raise StockNotFoundException(symbol)
         
         stock_data = {
-            "symbol": symbol.upper(),
+            "symbol": symbol,
             "performance": performance_data or {},
             "amount": stock.amount if stock else 0
         }
@@ -76,9 +131,14 @@ class StockService:
         
         try:
             if stock:
-                stock = await self.repository.update_market_data(symbol, stock_data)
+                previous_close = stock.close
+                with span("db"):
+                    stock = await self.repository.update_market_data(symbol, stock_data)
+                if stock and stock.amount and stock.close != previous_close:
+                    await invalidate_portfolio()
             else:
-                stock = await self.repository.create(stock_data)
+                with span("db"):
+                    stock = await self.repository.create(stock_data)
         except Exception as e:
             logger.error(f"Database operation failed for {symbol}: {e}")
             if polygon_data:
@@ -86,54 +146,109 @@ class StockService:
             raise
         
         try:
-            market_data = stock_data.copy()
-            market_data.pop('amount', None)
-            await cache_service.set(cache_key, market_data, ttl=300)
+            # Cache the stored row, not this fetch: after a Polygon failure the fetch carries no prices
+            market_data = stock_to_response(stock).model_dump(mode="json", by_alias=True, exclude={"amount"})
+            with span("cache"):
+                await cache_service.set(cache_key, market_data, ttl=market_calendar.cache_ttl(stock.from_date))
         except CacheException as e:
             logger.warning(f"Cache write failed for {symbol}: {e.message}")
         
         return self._to_response(stock)
 
     async def update_stock_amount(self, symbol: str, amount: int) -> Optional[StockResponse]:
+        if not is_valid_symbol(symbol):
+            raise InvalidSymbolException(symbol)
+        symbol = normalize_symbol(symbol)
         try:
             stock = await self.repository.update_amount(symbol, amount)
             if not stock:
-                stock_data = {"symbol": symbol.upper(), "amount": amount, "performance": "{}"}
-                stock = await self.repository.create(stock_data)
+                stock_data = {"symbol": symbol, "amount": amount, "performance": "{}"}
+                try:
+                    stock = await self.repository.create(stock_data)
+                except StockAPIException:
+                    # A concurrent request for the same new symbol created the row first
+                    stock = await self.repository.update_amount(symbol, amount)
+                    if not stock:
+                        raise
+                try:
+                    await cache_service.delete(f"stock:missing:{symbol}")
+                except CacheException as e:
+                    logger.warning(f"Negative cache invalidation failed for {symbol}: {e.message}")
+            await invalidate_portfolio()
             
             return self._to_response(stock)
         except Exception as e:
             logger.error(f"Failed to update stock amount for {symbol}: {e}")
             raise
 
+    async def _cache_missing(self, symbol: str, missing_key: str):
+        try:
+            await cache_service.set(missing_key, {"symbol": symbol}, ttl=settings.NEGATIVE_CACHE_TTL)
+        except CacheException as e:
+            logger.warning(f"Negative cache write failed for {symbol}: {e.message}")
+
+    async def _from_snapshot(self, symbol: str) -> Optional[StockResponse]:
+        await quote_snapshot.refresh()
+        quote = quote_snapshot.get(symbol)
+        if not quote or not snapshot_is_fresh(quote):
+            return None
+        STOCK_CACHE_LOOKUPS.labels(result="snapshot").inc()
+        logger.debug("Serving %s from quote snapshot", symbol)
+        with span("db"):
+            stock = await self.repository.get_by_symbol(symbol)
+        return StockResponse(**quote, amount=stock.amount if stock else 0)
+
     def _to_response(self, stock) -> StockResponse:
-        performance = {}
-        if stock.performance:
-            try:
-                performance = json.loads(stock.performance)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON in performance data for {stock.symbol}: {e}")
-                performance = {}
-        
-        return StockResponse(
-            symbol=stock.symbol,
-            afterHours=stock.after_hours,
-            close=stock.close,
-            **{"from": stock.from_date},
-            high=stock.high,
-            low=stock.low,
-            open=stock.open,
-            preMarket=stock.pre_market,
-            status=stock.status,
-            volume=stock.volume,
-            performance=performance,
-            amount=stock.amount,
-            updated_at=stock.updated_at
-        )
+        return stock_to_response(stock)
 
     async def cleanup(self):
         try:
             await self.polygon_service.close()
             await self.marketwatch_service.close()
         except Exception as e:
-            logger.error(f"Error during service cleanup: {e}")
\ No newline at end of file
+            logger.error(f"Error during service cleanup: {e}")
+
+def stock_to_response(stock) -> StockResponse:
+    performance = {}
+    if stock.performance:
+        try:
+            performance = json.loads(stock.performance)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid JSON in performance data for {stock.symbol}: {e}")
+            performance = {}
+    
+    return StockResponse(
+        symbol=stock.symbol,
+        afterHours=stock.after_hours,
+        close=stock.close,
+        **{"from": stock.from_date},
+        high=stock.high,
+        low=stock.low,
+        open=stock.open,
+        preMarket=stock.pre_market,
+        status=stock.status,
+        volume=stock.volume,
+        performance=performance,
+        amount=stock.amount,
+        updated_at=stock.updated_at
+    )
+
+def snapshot_is_fresh(quote: dict, now: Optional[datetime] = None) -> bool:
+    """A snapshot quote is served if it is recent, or if it holds the close of the latest completed session"""
+    # Daily bars only exist for completed sessions, so no refresh could return anything newer
+    if quote.get("from") == market_calendar.latest_completed_session(now).isoformat():
+        return True
+    if not quote.get("updated_at"):
+        return False
+    age = (now or datetime.utcnow()) - datetime.fromisoformat(quote["updated_at"])
+    return age <= timedelta(seconds=settings.QUOTE_SNAPSHOT_MAX_AGE)
+
+async def write_quote_snapshot(repository: StockRepository, path: Optional[str] = None) -> int:
+    """Dump every stock with market data to the local quote snapshot; the position amount is left out"""
+    stocks = await repository.get_quotes()
+    quotes = {
+        stock.symbol: stock_to_response(stock).model_dump(mode="json", by_alias=True, exclude={"amount"})
+        for stock in stocks
+    }
+    await asyncio.to_thread(write_snapshot, path or settings.QUOTE_SNAPSHOT_FILE, quotes)
+    return len(quotes)
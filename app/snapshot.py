@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Layout: magic, index length, JSON index {symbol: [offset, length]}, then one JSON document per symbol
+MAGIC = b"QSNAP1\n\0"
+_HEADER = struct.Struct("<8sQ")
+
+def write_snapshot(path: str, quotes: Dict[str, dict]):
+    """Write quotes atomically; readers keep their mapping of the previous file until they reload"""
+    payloads = {symbol: json.dumps(quote, default=str).encode("utf-8") for symbol, quote in sorted(quotes.items())}
+    index, offset = {}, 0
+    for symbol, payload in payloads.items():
+        index[symbol] = [offset, len(payload)]
+        offset += len(payload)
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".quotes-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            for payload in payloads.values():
+                f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class QuoteSnapshot:
+    """Read side of the quote snapshot: the file is memory-mapped and entries are decoded on demand"""
+
+    def __init__(self, path: str, reload_interval: float = 1.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        # (mapping, data offset, symbol -> (offset, length)); replaced as a whole on reload
+        self._state: Tuple[Optional[mmap.mmap], int, Dict[str, Tuple[int, int]]] = (None, 0, {})
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._state[2])
+
+    def load(self) -> int:
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_length = _HEADER.unpack_from(mapping, 0)
+            if magic != MAGIC:
+                raise ValueError("not a quote snapshot")
+            start = _HEADER.size
+            index = json.loads(mapping[start:start + index_length])
+        except FileNotFoundError:
+            self._state = (None, 0, {})
+            self._mtime = None
+            return 0
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Failed to load quote snapshot {self.path}: {e}")
+            return len(self)
+
+        # The previous mapping is left to the garbage collector, a concurrent reader may still hold it
+        self._state = (mapping, start + index_length, {symbol: tuple(entry) for symbol, entry in index.items()})
+        self._mtime = mtime
+        logger.info(f"Loaded quote snapshot with {len(index)} symbols from {self.path}")
+        return len(index)
+
+    async def refresh(self) -> bool:
+        """Remap the snapshot if the file was replaced, checking at most once per interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        await asyncio.to_thread(self.load)
+        return True
+
+    def get(self, symbol: str) -> Optional[dict]:
+        mapping, data_start, index = self._state
+        entry = index.get(symbol.upper())
+        if entry is None:
+            return None
+        offset, length = entry
+        return json.loads(mapping[data_start + offset:data_start + offset + length])
+
+quote_snapshot = QuoteSnapshot(settings.QUOTE_SNAPSHOT_FILE)
@@ -0,0 +1,96 @@
+import asyncio
+import bisect
+import csv
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_PATTERN = re.compile(r"^[A-Z][A-Z0-9]{0,9}([.\-][A-Z0-9]{1,3})?$")
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+def is_valid_symbol(symbol: str) -> bool:
+    """Cheap local check that rejects symbols no exchange could list"""
+    return bool(SYMBOL_PATTERN.match(normalize_symbol(symbol)))
+
+class SymbolIndex:
+    """In-memory ticker reference loaded from a local CSV file (symbol,name)"""
+
+    def __init__(self, path: str, reload_interval: float = 30.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        # (sorted symbols, symbol -> name); replaced as a whole so readers never see a partial reload
+        self._state: Tuple[List[str], Dict[str, str]] = ([], {})
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._state[1])
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+    def load(self) -> int:
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, newline="", encoding="utf-8") as f:
+                names = {}
+                for row in csv.DictReader(f):
+                    symbol = normalize_symbol(row.get("symbol") or "")
+                    if is_valid_symbol(symbol):
+                        names[symbol] = (row.get("name") or "").strip()
+        except FileNotFoundError:
+            logger.warning(f"Symbol reference file {self.path} not found, symbol index disabled")
+            self._state = ([], {})
+            self._mtime = None
+            return 0
+        except (OSError, csv.Error) as e:
+            logger.error(f"Failed to load symbol reference file {self.path}: {e}")
+            return len(self)
+
+        self._state = (sorted(names), names)
+        self._mtime = mtime
+        logger.info(f"Loaded {len(names)} symbols from {self.path}")
+        return len(names)
+
+    async def refresh(self) -> bool:
+        """Reload the index if the reference file changed, checking at most once per interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        await asyncio.to_thread(self.load)
+        return True
+
+    def contains(self, symbol: str) -> bool:
+        return normalize_symbol(symbol) in self._state[1]
+
+    def name(self, symbol: str) -> Optional[str]:
+        return self._state[1].get(normalize_symbol(symbol))
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        symbols, names = self._state
+        prefix = normalize_symbol(prefix)
+        results = []
+        for i in range(bisect.bisect_left(symbols, prefix), len(symbols)):
+            symbol = symbols[i]
+            if not symbol.startswith(prefix) or len(results) >= limit:
+                break
+            results.append((symbol, names[symbol]))
+        return results
+
+symbol_index = SymbolIndex(settings.SYMBOLS_FILE, settings.SYMBOLS_RELOAD_INTERVAL)
@@ -1,13 +1,19 @@
 from celery import Celery
+from celery.signals import setup_logging, worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 import asyncio
 import logging
+import os
+from typing import Optional
 
-from app.database import AsyncSessionLocal
+from app import market_calendar
+from app.metrics import SYNC_DURATION_SECONDS, mark_process_dead, start_metrics_server
 from app.repositories.stock import StockRepository
-from app.services.polygon import PolygonService
-from app.services.marketwatch import MarketWatchService
+from app.services.portfolio import invalidate_portfolio
+from app.services.stock import write_quote_snapshot
+from app.worker import WorkerRuntime, worker_runtime
 
 from app.config import settings
+from app.logging_config import configure_logging
 
 logger = logging.getLogger(__name__)
 
@@ -31,33 +37,76 @@ celery_app.conf.update(
     },
 )
 
+@setup_logging.connect
+def _setup_logging(**kwargs):
+    # Connecting here stops Celery from installing its own synchronous handlers
+    configure_logging()
+
+@worker_init.connect
+def _start_worker_metrics(**kwargs):
+    # Runs once in the main worker process; with PROMETHEUS_MULTIPROC_DIR it also reports the pool children
+    if settings.WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+        logger.info(f"Serving worker metrics on port {settings.WORKER_METRICS_PORT}")
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    # The queue listener and runtime threads do not survive the prefork fork
+    configure_logging()
+    worker_runtime.start()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_runtime(**kwargs):
+    worker_runtime.shutdown()
+
+@worker_process_shutdown.connect
+def _mark_worker_process_dead(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
 @celery_app.task
 def sync_popular_stocks():
     popular_symbols = settings.STOCK_SYMBOLS
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
+    with SYNC_DURATION_SECONDS.time():
+        worker_runtime.run(_sync_stocks_async(popular_symbols, worker_runtime))
+
+async def _sync_stocks_async(symbols: list, runtime: Optional[WorkerRuntime] = None):
+    """Sync symbols using the runtime's clients, or with short-lived ones when run outside a worker"""
+    owned = runtime is None
+    if owned:
+        runtime = WorkerRuntime()
+        await runtime.open()
     try:
-        loop.run_until_complete(_sync_stocks_async(popular_symbols))
+        await _sync_symbols(symbols, runtime)
     finally:
-        loop.close()
+        if owned:
+            await runtime.aclose()
 
-async def _sync_stocks_async(symbols: list):
-    polygon_service = PolygonService()
-    marketwatch_service = MarketWatchService()
+async def _sync_symbols(symbols: list, runtime: WorkerRuntime):
+    polygon_service = runtime.polygon_service
+    marketwatch_service = runtime.marketwatch_service
+    
+    portfolio_changed = False
+    session_final = market_calendar.is_session_final()
+    latest_session = market_calendar.latest_completed_session().isoformat()
     
-    async with AsyncSessionLocal() as db:
+    async with runtime.session_factory() as db:
         repository = StockRepository(db)
         
         for symbol in symbols:
             try:
-                polygon_task = polygon_service.get_daily_open_close(symbol)
+                existing_stock = await repository.get_by_symbol(symbol)
+                if session_final and existing_stock and existing_stock.from_date == latest_session:
+                    logger.debug("Skipping %s, %s session already synced", symbol, latest_session)
+                    continue
+                
+                polygon_task = polygon_service.get_daily_open_close(symbol, latest_session)
                 marketwatch_task = marketwatch_service.get_performance_data(symbol)
                 
                 polygon_data, performance_data = await asyncio.gather(
                     polygon_task, marketwatch_task, return_exceptions=True
                 )
-                logger.info(f"Fetched data for {symbol}: polygon_data={polygon_data}, performance_data={performance_data}")
+                logger.debug("Fetched data for %s: polygon_data=%s, performance_data=%s", symbol, polygon_data, performance_data)
                 if not isinstance(polygon_data, Exception) and polygon_data:
                     stock_data = {
                         "symbol": symbol,
@@ -65,9 +114,11 @@ async def _sync_stocks_async(symbols: list):
                         **polygon_data
                     }
                     
-                    existing_stock = await repository.get_by_symbol(symbol)
                     if existing_stock:
-                        await repository.update_market_data(symbol, stock_data)
+                        previous_close = existing_stock.close
+                        stock = await repository.update_market_data(symbol, stock_data)
+                        if stock and stock.amount and stock.close != previous_close:
+                            portfolio_changed = True
                     else:
                         await repository.create(stock_data)
                         
@@ -75,6 +126,12 @@ async def _sync_stocks_async(symbols: list):
                 
             except Exception as e:
                 logger.error(f"Error syncing {symbol}: {e}")
+        
+        try:
+            count = await write_quote_snapshot(repository)
+            logger.info(f"Wrote quote snapshot with {count} symbols")
+        except Exception as e:
+            logger.error(f"Failed to write quote snapshot: {e}")
     
-    await polygon_service.close()
-    await marketwatch_service.close()
\ No newline at end of file
+    if portfolio_changed:
+        await invalidate_portfolio(runtime.cache)
\ No newline at end of file
@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import redis.asyncio as redis
+from app.cache import CacheService
+from app.exceptions import CacheException
+
+@pytest.mark.asyncio
+async def test_reconnect_backs_off():
+    """Test that a failed connection is not retried on every call"""
+    client = MagicMock()
+    client.ping = AsyncMock(side_effect=redis.ConnectionError("refused"))
+    client.aclose = AsyncMock()
+    cache = CacheService()
+    
+    with patch('redis.asyncio.from_url', return_value=client) as mock_from_url:
+        for _ in range(3):
+            with pytest.raises(CacheException):
+                await cache.get("stock:AAPL")
+    
+    assert mock_from_url.call_count == 1
+    assert not cache.healthy
+    assert cache._redis is None
+
+@pytest.mark.asyncio
+async def test_lost_connection_is_dropped():
+    """Test that a connection error on an established client schedules a reconnect"""
+    client = MagicMock()
+    client.ping = AsyncMock(return_value=True)
+    client.mget = AsyncMock(side_effect=redis.ConnectionError("reset"))
+    client.aclose = AsyncMock()
+    cache = CacheService()
+    
+    with patch('redis.asyncio.from_url', return_value=client):
+        with pytest.raises(CacheException):
+            await cache.get_many(["stock:AAPL"])
+        with pytest.raises(CacheException):
+            await cache.get_many(["stock:AAPL"])
+    
+    assert client.mget.call_count == 1
+    assert not cache.healthy
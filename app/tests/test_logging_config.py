@@ -0,0 +1,49 @@
+import logging
+from prometheus_client import REGISTRY
+
+from app.logging_config import RateLimitFilter
+
+def make_record(created: float, lineno: int = 10, level: int = logging.WARNING, name: str = "app.test") -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, lineno, "upstream failed", None, None)
+    record.created = created
+    return record
+
+def test_rate_limit_filter_drops_flood_per_call_site():
+    """Test records beyond the burst are dropped until the window rolls over"""
+    rate_filter = RateLimitFilter(burst=2, interval=60)
+    
+    passed = [rate_filter.filter(make_record(100.0 + i)) for i in range(5)]
+    other_site = rate_filter.filter(make_record(105.0, lineno=20))
+    
+    assert passed == [True, True, False, False, False]
+    assert other_site
+
+def test_rate_limit_filter_reports_suppressed_count():
+    """Test the next window's first record reports how many were dropped"""
+    rate_filter = RateLimitFilter(burst=1, interval=60)
+    for i in range(4):
+        rate_filter.filter(make_record(100.0 + i))
+    
+    record = make_record(200.0)
+    
+    assert rate_filter.filter(record)
+    assert record.getMessage() == "upstream failed [3 similar messages suppressed]"
+
+def test_rate_limit_filter_never_drops_errors_or_access_log():
+    """Test ERROR and above and uvicorn access lines always pass"""
+    rate_filter = RateLimitFilter(burst=1, interval=60)
+    
+    assert all(rate_filter.filter(make_record(100.0, level=logging.ERROR)) for _ in range(3))
+    assert all(rate_filter.filter(make_record(100.0, level=logging.CRITICAL)) for _ in range(3))
+    assert all(rate_filter.filter(make_record(100.0, level=logging.INFO, name="uvicorn.access")) for _ in range(3))
+
+def test_rate_limit_filter_counts_drops():
+    """Test every dropped record is counted per logger"""
+    rate_filter = RateLimitFilter(burst=1, interval=60)
+    labels = {"logger": "app.counted"}
+    before = REGISTRY.get_sample_value("log_records_suppressed_total", labels) or 0.0
+    
+    for i in range(4):
+        rate_filter.filter(make_record(100.0 + i, name="app.counted"))
+    
+    assert REGISTRY.get_sample_value("log_records_suppressed_total", labels) - before == 3
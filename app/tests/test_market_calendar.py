@@ -0,0 +1,54 @@
+from datetime import date, datetime
+
+from app import market_calendar
+from app.config import settings
+from app.market_calendar import MARKET_TZ
+
+def et(*args) -> datetime:
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+def test_market_holidays():
+    """Test rule-based NYSE holidays including observed dates"""
+    holidays = market_calendar.market_holidays(2024)
+    
+    assert date(2024, 1, 1) in holidays
+    assert date(2024, 3, 29) in holidays  # Good Friday
+    assert date(2024, 5, 27) in holidays  # Memorial Day
+    assert date(2024, 6, 19) in holidays
+    assert date(2024, 11, 28) in holidays  # Thanksgiving
+    assert date(2021, 12, 24) in market_calendar.market_holidays(2021)  # Christmas on Saturday
+    assert date(2021, 12, 31) not in market_calendar.market_holidays(2021)  # New Year on Saturday
+
+def test_latest_completed_session():
+    """Test resolution of the latest session with a final daily bar"""
+    # Saturday -> Friday
+    assert market_calendar.latest_completed_session(et(2024, 1, 13, 12, 0)) == date(2024, 1, 12)
+    # Tuesday before the open, Monday was MLK day -> previous Friday
+    assert market_calendar.latest_completed_session(et(2024, 1, 16, 8, 0)) == date(2024, 1, 12)
+    # Intraday -> previous session
+    assert market_calendar.latest_completed_session(et(2024, 1, 17, 11, 0)) == date(2024, 1, 16)
+    # After the close has settled -> today
+    assert market_calendar.latest_completed_session(et(2024, 1, 17, 17, 0)) == date(2024, 1, 17)
+
+def test_is_market_open():
+    """Test regular session hours"""
+    assert market_calendar.is_market_open(et(2024, 1, 17, 9, 30))
+    assert not market_calendar.is_market_open(et(2024, 1, 17, 16, 0))
+    assert not market_calendar.is_market_open(et(2024, 1, 15, 12, 0))  # MLK day
+
+def test_cache_ttl():
+    """Test TTLs are short during the session and last until the next open only for the latest final bar"""
+    assert market_calendar.cache_ttl("2024-01-16", et(2024, 1, 17, 11, 0)) == settings.CACHE_TTL
+    assert market_calendar.cache_ttl("2024-01-16", et(2024, 1, 17, 16, 5)) == settings.CACHE_TTL
+    # Friday evening -> Tuesday open after MLK day
+    friday_evening = et(2024, 1, 12, 18, 0)
+    assert market_calendar.cache_ttl("2024-01-12", friday_evening) == int(
+        (et(2024, 1, 16, 9, 30) - friday_evening).total_seconds()
+    )
+    # An older bar, or none at all (the Polygon fetch failed), may still be refreshed
+    assert market_calendar.cache_ttl("2024-01-11", friday_evening) == settings.CACHE_TTL
+    assert market_calendar.cache_ttl(None, friday_evening) == settings.CACHE_TTL
+
+def test_naive_datetimes_are_utc():
+    """Test naive timestamps are treated as UTC"""
+    assert market_calendar.is_market_open(datetime(2024, 1, 17, 15, 0))
@@ -0,0 +1,50 @@
+import socket
+import urllib.request
+import pytest
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.metrics import DB_QUERY_SECONDS, render_metrics, timed
+from app.tasks import _start_worker_metrics
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.asyncio
+async def test_timed_observes_async_calls():
+    """Test the decorator records one observation per call, including failures"""
+    @timed(DB_QUERY_SECONDS, operation="test_operation")
+    async def failing():
+        raise ValueError("boom")
+    
+    before = sample("db_query_duration_seconds_count", operation="test_operation")
+    with pytest.raises(ValueError):
+        await failing()
+    
+    assert sample("db_query_duration_seconds_count", operation="test_operation") == before + 1
+
+def test_render_metrics_prometheus_text():
+    """Test the exposition includes the instrumented families"""
+    body, content_type = render_metrics()
+    
+    assert content_type.startswith("text/plain")
+    for family in (
+        b"http_request_duration_seconds",
+        b"cache_operation_duration_seconds",
+        b"db_query_duration_seconds",
+        b"upstream_request_duration_seconds",
+        b"stock_cache_lookups_total",
+    ):
+        assert family in body
+
+def test_worker_serves_its_own_metrics(monkeypatch):
+    """Test the Celery worker exposes the sync duration on WORKER_METRICS_PORT"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(settings, "WORKER_METRICS_PORT", port)
+    
+    _start_worker_metrics()
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read()
+    
+    assert b"stock_sync_duration_seconds" in body
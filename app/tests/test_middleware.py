@@ -0,0 +1,69 @@
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.exceptions import StockNotFoundException
+from app.middleware import ErrorHandlingMiddleware, register_exception_handlers
+
+@pytest.fixture
+def middleware_client():
+    """Minimal app wired like app.main"""
+    test_app = FastAPI()
+    test_app.add_middleware(ErrorHandlingMiddleware)
+    register_exception_handlers(test_app)
+
+    @test_app.get("/missing")
+    async def missing():
+        raise StockNotFoundException("ZZZZ")
+
+    @test_app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @test_app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]))
+
+    with TestClient(test_app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+def test_stock_api_exception_contract(middleware_client):
+    """Test StockAPIException subclasses keep the JSON error contract"""
+    response = middleware_client.get("/missing")
+    
+    assert response.status_code == 404
+    assert response.json() == {"error": True, "message": "Stock ZZZZ not found", "type": "StockNotFoundException"}
+
+def test_client_errors_logged_below_error(middleware_client, caplog):
+    """Test 4xx responses are not logged at ERROR, so the log rate limit still applies to them"""
+    with caplog.at_level(logging.INFO, logger="app.middleware"):
+        middleware_client.get("/missing")
+    
+    records = [record for record in caplog.records if record.name == "app.middleware"]
+    assert records and all(record.levelno < logging.ERROR for record in records)
+
+def test_unexpected_exception_contract(middleware_client):
+    """Test unhandled errors become a JSON 500"""
+    response = middleware_client.get("/boom")
+    
+    assert response.status_code == 500
+    assert response.json() == {"error": True, "message": "Internal server error", "type": "InternalServerError"}
+
+def test_timing_header_and_streaming(middleware_client):
+    """Test responses carry the processing time and streams pass through"""
+    response = middleware_client.get("/stream")
+    
+    assert response.content == b"abc"
+    assert float(response.headers["X-Process-Time"]) >= 0
+
+def test_request_latency_is_labelled_by_route(middleware_client):
+    """Test request metrics use the route template and status"""
+    labels = {"method": "GET", "route": "/missing", "status": "404"}
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0.0
+    
+    middleware_client.get("/missing")
+    
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) == before + 1
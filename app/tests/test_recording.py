@@ -0,0 +1,89 @@
+import gzip
+import httpx
+import pytest
+from app.config import settings
+from app.recording import RecordingTransport, ReplayTransport, UpstreamCorpus, upstream_transport
+from app.services.polygon import PolygonService
+
+POLYGON_BODY = {
+    "status": "OK", "from": "2024-01-16", "symbol": "AAPL", "open": 150.0, "high": 155.0,
+    "low": 149.0, "close": 152.0, "volume": 1000000, "afterHours": 152.5, "preMarket": 149.5,
+}
+
+def polygon_upstream(request: httpx.Request) -> httpx.Response:
+    if "ZZZZ" in request.url.path:
+        return httpx.Response(404, json={"status": "NOT_FOUND"})
+    return httpx.Response(200, json=POLYGON_BODY)
+
+async def record_polygon(corpus: UpstreamCorpus, *symbols: str):
+    async with httpx.AsyncClient(transport=RecordingTransport(corpus, httpx.MockTransport(polygon_upstream))) as client:
+        for symbol in symbols:
+            await client.get(f"https://api.polygon.io/v1/open-close/{symbol}/2024-01-16", params={"apikey": "secret"})
+
+@pytest.mark.asyncio
+async def test_recording_strips_credentials(tmp_path):
+    """Test that recorded responses are written without the API key"""
+    path = tmp_path / "corpus.jsonl.gz"
+    await record_polygon(UpstreamCorpus(str(path)), "AAPL")
+
+    with gzip.open(path, "rt") as f:
+        content = f.read()
+    assert "secret" not in content
+    assert "https://api.polygon.io/v1/open-close/AAPL/2024-01-16" in content
+
+@pytest.mark.asyncio
+async def test_recording_gzip_upstream(tmp_path):
+    """Test that a gzip-encoded upstream response is recorded and returned decoded"""
+    def gzip_upstream(request: httpx.Request) -> httpx.Response:
+        body = gzip.compress(b'{"status": "OK", "close": 152.0}')
+        return httpx.Response(200, headers={"Content-Encoding": "gzip", "Content-Length": str(len(body))}, content=body)
+
+    corpus = UpstreamCorpus(str(tmp_path / "corpus.jsonl.gz"))
+    async with httpx.AsyncClient(transport=RecordingTransport(corpus, httpx.MockTransport(gzip_upstream))) as client:
+        response = await client.get("https://api.polygon.io/v1/open-close/AAPL/2024-01-16")
+
+    assert response.json() == {"status": "OK", "close": 152.0}
+    entry = corpus.entries()[0]
+    assert entry["text"] == '{"status": "OK", "close": 152.0}'
+    assert not any(name.lower() == "content-encoding" for name, _ in entry["headers"])
+
+@pytest.mark.asyncio
+async def test_replay_serves_recorded_responses(tmp_path):
+    """Test that a reloaded corpus replays status and body, matching any date"""
+    path = str(tmp_path / "corpus.jsonl.gz")
+    await record_polygon(UpstreamCorpus(path), "AAPL", "ZZZZ")
+
+    transport = ReplayTransport(UpstreamCorpus(path).load(), delay_scale=0)
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.polygon.io/v1/open-close/AAPL/2024-03-01", params={"apikey": "other"})
+        missing = await client.get("https://api.polygon.io/v1/open-close/ZZZZ/2024-01-16")
+
+        assert response.status_code == 200
+        assert response.json() == POLYGON_BODY
+        assert missing.status_code == 404
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://api.polygon.io/v1/open-close/MSFT/2024-01-16")
+
+@pytest.mark.asyncio
+async def test_polygon_service_replay(tmp_path, monkeypatch):
+    """Test that UPSTREAM_MODE=replay routes the service through the corpus"""
+    path = str(tmp_path / "corpus.jsonl.gz")
+    await record_polygon(UpstreamCorpus(path), "AAPL")
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replay")
+    monkeypatch.setattr(settings, "UPSTREAM_CORPUS", path)
+    monkeypatch.setattr(settings, "UPSTREAM_REPLAY_DELAY_SCALE", 0.0)
+
+    service = PolygonService()
+    try:
+        data = await service.get_daily_open_close("AAPL", "2024-01-16")
+    finally:
+        await service.close()
+
+    assert data["close"] == 152.0
+
+def test_upstream_transport_rejects_unknown_mode(monkeypatch):
+    """Test that a mistyped UPSTREAM_MODE fails loudly instead of going live"""
+    monkeypatch.setattr(settings, "UPSTREAM_MODE", "replays")
+
+    with pytest.raises(ValueError):
+        upstream_transport()
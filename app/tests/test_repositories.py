@@ -1,5 +1,6 @@
 import pytest
 from app.repositories.stock import StockRepository
+from app.models.performance import StockPerformance
 
 @pytest.mark.asyncio
 async def test_create_stock(test_db, sample_stock_data):
@@ -12,6 +13,16 @@ async def test_create_stock(test_db, sample_stock_data):
     assert stock.close == 152.0
     assert stock.amount == 10
 
+@pytest.mark.asyncio
+async def test_create_leaves_input_untouched(test_db, sample_stock_data):
+    """Test that create does not serialise the caller's performance dict in place"""
+    repository = StockRepository(test_db)
+    stock_data = {**sample_stock_data, "performance": {"5_day": "+1.0%"}}
+    
+    await repository.create(stock_data)
+    
+    assert stock_data["performance"] == {"5_day": "+1.0%"}
+
 @pytest.mark.asyncio
 async def test_get_stock_by_symbol(test_db, sample_stock_data):
     """Test getting stock by symbol"""
@@ -64,4 +75,187 @@ async def test_update_market_data(test_db, sample_stock_data):
     
     assert updated_stock is not None
     assert updated_stock.close == 160.0
-    assert updated_stock.high == 165.0
\ No newline at end of file
+    assert updated_stock.high == 165.0
+
+@pytest.mark.asyncio
+async def test_get_positions(test_db, sample_stock_data):
+    """Test positions are valued in a single query and unheld stocks are skipped"""
+    repository = StockRepository(test_db)
+    
+    await repository.create(sample_stock_data)
+    await repository.create({"symbol": "MSFT", "close": 400.0, "amount": 0})
+    await repository.create({"symbol": "TSLA", "amount": 3})
+    
+    positions = await repository.get_positions()
+    
+    assert [(p.symbol, p.amount, p.value) for p in positions] == [
+        ("AAPL", 10, 1520.0),
+        ("TSLA", 3, None),
+    ]
+
+@pytest.mark.asyncio
+async def test_performance_metrics_are_typed(test_db, sample_stock_data):
+    """Test scraped performance text is stored as indexed numeric columns"""
+    repository = StockRepository(test_db)
+    sample_stock_data["performance"] = {"5_day": "+5.23%", "1_month": "−1,204.5%", "ytd": "N/A"}
+    
+    await repository.create(sample_stock_data)
+    await repository.update_market_data("AAPL", {"performance": {"5_day": "-0.5%"}})
+    
+    metrics = await test_db.get(StockPerformance, "AAPL")
+    
+    assert metrics.perf_5d == -0.5
+    assert metrics.perf_1m is None
+    assert metrics.perf_ytd is None
+
+@pytest.mark.asyncio
+async def test_screen_filters_sorts_and_pages(test_db):
+    """Test screener filters, sort order and keyset pagination"""
+    repository = StockRepository(test_db)
+    for symbol, close, perf in [("AAA", 10.0, "1%"), ("BBB", 20.0, "5%"), ("CCC", 20.0, "9%"), ("DDD", 5.0, "3%")]:
+        await repository.create({"symbol": symbol, "close": close, "volume": 100, "performance": {"5_day": perf}})
+    
+    first = await repository.screen({"perf_5d": (2.0, None)}, sort="price", descending=True, limit=2)
+    assert [row.symbol for row in first] == ["CCC", "BBB"]
+    
+    last = first[-1]
+    rest = await repository.screen(
+        {"perf_5d": (2.0, None)}, sort="price", descending=True, limit=2, after=(last.close, last.symbol)
+    )
+    assert [row.symbol for row in rest] == ["DDD"]
+
+@pytest.mark.asyncio
+async def test_iter_export_streams_chunks(test_db):
+    """Test the export reads every stock in symbol order, chunk by chunk, and resumes after a symbol"""
+    repository = StockRepository(test_db)
+    for symbol in ["CCC", "AAA", "EEE", "BBB", "DDD"]:
+        await repository.create({"symbol": symbol, "close": 10.0, "performance": {"5_day": "+2.5%"}})
+    
+    chunks = []
+    async for chunk in repository.iter_export(chunk_size=2):
+        # No read transaction stays open while the consumer holds a chunk
+        assert not test_db.in_transaction()
+        chunks.append(chunk)
+    assert [[row.symbol for row in chunk] for chunk in chunks] == [["AAA", "BBB"], ["CCC", "DDD"], ["EEE"]]
+    assert chunks[0][0].perf_5d == 2.5
+    
+    resumed = [row.symbol async for chunk in repository.iter_export(after="CCC") for row in chunk]
+    assert resumed == ["DDD", "EEE"]
+
+@pytest.mark.asyncio
+async def test_init_schema_skips_matching_version(tmp_path):
+    """Test that schema bootstrap runs DDL once and then only checks the stored version"""
+    from sqlalchemy import inspect, update
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.database import init_schema, schema_meta
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/schema.db")
+    try:
+        assert await init_schema(engine) is True
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        assert {"stocks", "schema_meta"} <= set(tables)
+        
+        assert await init_schema(engine) is False
+        
+        async with engine.begin() as conn:
+            await conn.execute(update(schema_meta).values(value="stale"))
+        assert await init_schema(engine) is True
+        assert await init_schema(engine) is False
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_init_schema_concurrent_bootstrap(tmp_path):
+    """Test that workers bootstrapping one empty database at once all succeed and only one runs DDL"""
+    import asyncio
+    from app.database import create_database_engine, init_schema
+    
+    engines = [create_database_engine(f"sqlite+aiosqlite:///{tmp_path}/shared.db") for _ in range(4)]
+    try:
+        results = await asyncio.gather(*(init_schema(engine) for engine in engines))
+    finally:
+        for engine in engines:
+            await engine.dispose()
+    
+    assert sorted(results) == [False, False, False, True]
+
+@pytest.mark.asyncio
+async def test_database_engine_configures_sqlite(tmp_path):
+    """Test that SQLite connections use WAL and wait for the write lock instead of failing at once"""
+    from app.config import settings
+    from app.database import create_database_engine
+    
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path}/wal.db")
+    try:
+        async with engine.connect() as conn:
+            journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+            busy_timeout = (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar()
+    finally:
+        await engine.dispose()
+    
+    assert journal_mode == "wal"
+    assert busy_timeout == int(settings.SQLITE_BUSY_TIMEOUT * 1000)
+
+LEGACY_STOCKS_DDL = """
+CREATE TABLE stocks (
+    id INTEGER NOT NULL, symbol VARCHAR NOT NULL, after_hours FLOAT, close FLOAT, from_date VARCHAR,
+    high FLOAT, low FLOAT, open FLOAT, pre_market FLOAT, status VARCHAR, volume INTEGER,
+    performance VARCHAR, amount INTEGER, updated_at DATETIME, PRIMARY KEY (id)
+)
+"""
+
+async def bootstrap_legacy_database(path):
+    """Upgrade a database laid out like the shipped data/stocks.db; returns the stocks indexes and performance rows"""
+    from sqlalchemy import inspect, text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.database import init_schema
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(LEGACY_STOCKS_DDL))
+            await conn.execute(text("CREATE UNIQUE INDEX ix_stocks_symbol ON stocks (symbol)"))
+            await conn.execute(
+                text("INSERT INTO stocks (id, symbol, close, amount, performance) VALUES (:id, :symbol, :close, :amount, :performance)"),
+                [
+                    {"id": 1, "symbol": "AAPL", "close": 152.0, "amount": 10, "performance": '{"5_day": "3.25%", "ytd": "-4.28%"}'},
+                    {"id": 2, "symbol": "MSFT", "close": 400.0, "amount": 0, "performance": None},
+                ]
+            )
+        assert await init_schema(engine) is True
+        async with engine.connect() as conn:
+            indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("stocks"))
+            performance = (await conn.execute(text("SELECT symbol, perf_5d, perf_ytd FROM stock_performance"))).all()
+    finally:
+        await engine.dispose()
+    return {index["name"] for index in indexes}, performance
+
+@pytest.mark.asyncio
+async def test_init_schema_upgrades_existing_tables(tmp_path):
+    """Test that an existing stocks table gains the screener indexes and its performance JSON is backfilled"""
+    indexes, performance = await bootstrap_legacy_database(tmp_path / "legacy.db")
+    
+    assert {"ix_stocks_close", "ix_stocks_volume"} <= indexes
+    assert performance == [("AAPL", 3.25, -4.28)]
+
+@pytest.mark.asyncio
+async def test_positions_read_held_index_after_upgrade(tmp_path):
+    """Test that an upgraded database answers get_positions from the partial held-positions index"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    path = tmp_path / "legacy.db"
+    indexes, _ = await bootstrap_legacy_database(path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with engine.connect() as conn:
+            # Same shape as get_positions, including the bound parameter SQLAlchemy sends
+            plan = (await conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT symbol, amount, close, amount * close FROM stocks WHERE amount > :held ORDER BY symbol"
+            ), {"held": 0})).all()
+    finally:
+        await engine.dispose()
+    
+    assert "ix_stocks_held" in indexes
+    assert "ix_stocks_held" in plan[0][-1]
@@ -1,8 +1,33 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from app.services.stock import StockService
+from app.services.portfolio import PORTFOLIO_CACHE_KEY, PortfolioService
+from app.services.screener import ScreenerService
+from app.services.export import ExportService
+from app.api.export import accepts_gzip
+from app.schemas.screener import ScreenerQuery
 from app.repositories.stock import StockRepository
 from app.schemas.stock import StockResponse
+from app.config import settings
+from app.tests.conftest import TestAsyncSessionLocal
+from app.pagination import encode_cursor
+from app.main import app
+from fastapi.testclient import TestClient
+from app.snapshot import QuoteSnapshot
+from app.services.stock import write_quote_snapshot
+from app.exceptions import (
+    CacheException,
+    ExternalAPIException,
+    ExternalNotFoundException,
+    InvalidQueryException,
+    InvalidSymbolException,
+    StockNotFoundException,
+)
 
 @pytest.mark.asyncio
 async def test_stock_service_get_stock_from_cache(test_db, sample_stock_data):
@@ -78,4 +103,341 @@ async def test_update_stock_amount_existing_stock(test_db, sample_stock_data):
     
     assert isinstance(result, StockResponse)
     assert result.symbol == "AAPL"
-    assert result.amount == 15  # 10 + 5
\ No newline at end of file
+    assert result.amount == 15  # 10 + 5
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_to_new_stock_add_up(test_db):
+    """Test that concurrent additions to a new holding all land in one row"""
+    import asyncio
+    sessions = [TestAsyncSessionLocal() for _ in range(8)]
+    try:
+        results = await asyncio.gather(*(
+            StockService(StockRepository(session)).update_stock_amount("RACE", 1) for session in sessions
+        ))
+    finally:
+        for session in sessions:
+            await session.close()
+    
+    assert all(result.symbol == "RACE" for result in results)
+    stock = await StockRepository(test_db).get_by_symbol("RACE")
+    assert stock.amount == 8
+
+@pytest.mark.asyncio
+async def test_get_stock_rejects_invalid_symbol(test_db):
+    """Test malformed symbols are rejected before any network call"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    
+    with patch.object(service.polygon_service, 'get_daily_open_close') as mock_polygon:
+        with pytest.raises(InvalidSymbolException):
+            await service.get_stock("NOT A TICKER!")
+        
+        mock_polygon.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_stock_normalises_symbol(test_db, sample_stock_data):
+    """Test a padded lower-case symbol uses the same cache keys, row and upstream symbol as its canonical form"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(service.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_polygon.return_value = {"status": "OK", "from_date": "2024-01-11", "symbol": "AAPL", "close": 153.0}
+        mock_mw.return_value = {}
+        
+        result = await service.get_stock(" aapl ")
+        
+        mock_cache.get_many.assert_awaited_once_with(["stock:AAPL", "stock:missing:AAPL"])
+        mock_polygon.assert_awaited_once_with("AAPL")
+        mock_mw.assert_awaited_once_with("AAPL")
+        assert mock_cache.set.await_args.args[0] == "stock:AAPL"
+    
+    assert result.symbol == "AAPL"
+    assert result.amount == 10
+    assert result.close == 153.0
+    assert (await repository.get_by_symbol(" AAPL")) is None
+
+@pytest.mark.asyncio
+async def test_update_stock_amount_normalises_symbol(test_db, sample_stock_data):
+    """Test holdings added under a padded lower-case symbol land on the canonical row, and malformed ones are rejected"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    
+    result = await service.update_stock_amount(" aapl", 5)
+    
+    assert result.symbol == "AAPL"
+    assert result.amount == 15
+    with pytest.raises(InvalidSymbolException):
+        await service.update_stock_amount("NOT A TICKER!", 5)
+
+@pytest.mark.asyncio
+async def test_get_stock_negative_cache_hit(test_db):
+    """Test a cached miss short-circuits the upstream calls"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close') as mock_polygon:
+        mock_cache.get_many = AsyncMock(return_value=[None, {"symbol": "ZZZZ"}])
+        
+        with pytest.raises(StockNotFoundException):
+            await service.get_stock("ZZZZ")
+        
+        mock_polygon.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_stock_caches_unknown_symbol(test_db):
+    """Test a symbol unknown to both upstreams is negatively cached"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(service.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_polygon.side_effect = ExternalNotFoundException("Polygon", "ZZZZ")
+        mock_mw.side_effect = ExternalNotFoundException("MarketWatch", "ZZZZ")
+        
+        with pytest.raises(StockNotFoundException):
+            await service.get_stock("ZZZZ")
+        
+        mock_cache.set.assert_awaited_once_with(
+            "stock:missing:ZZZZ", {"symbol": "ZZZZ"}, ttl=settings.NEGATIVE_CACHE_TTL
+        )
+
+@pytest.mark.asyncio
+async def test_get_stock_outage_is_not_cached(test_db):
+    """Test upstream outages surface as errors and are not negatively cached"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(service.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_polygon.side_effect = ExternalAPIException("Polygon", "HTTP 502")
+        mock_mw.side_effect = ExternalNotFoundException("MarketWatch", "ZZZZ")
+        
+        with pytest.raises(ExternalAPIException) as exc_info:
+            await service.get_stock("ZZZZ")
+        
+        assert exc_info.value.status_code == 503
+        mock_cache.set.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_polygon_failure_caches_stored_row_briefly(test_db, sample_stock_data):
+    """Test a Polygon failure for a stored symbol caches the stored prices with the short TTL"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(service.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_polygon.side_effect = ExternalAPIException("Polygon", "HTTP 429")
+        mock_mw.return_value = {"5_day": "+1.0%"}
+        
+        result = await service.get_stock("AAPL")
+        
+        assert result.close == 152.0
+        key, cached = mock_cache.set.call_args.args
+        assert key == "stock:AAPL"
+        assert cached["close"] == 152.0 and cached["from"] == "2024-01-10"
+        assert mock_cache.set.call_args.kwargs == {"ttl": settings.CACHE_TTL}
+        assert StockResponse(**cached, amount=0).close == 152.0
+
+@pytest.mark.asyncio
+async def test_get_stock_served_from_snapshot_when_redis_down(test_db, sample_stock_data, tmp_path):
+    """Test that a Redis outage falls back to the local quote snapshot, not the upstreams"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    path = str(tmp_path / "quotes.snapshot")
+    assert await write_quote_snapshot(repository, path) == 1
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch('app.services.stock.quote_snapshot', QuoteSnapshot(path)), \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon:
+        mock_cache.get_many = AsyncMock(side_effect=CacheException("Redis unavailable"))
+        
+        result = await service.get_stock("AAPL")
+        
+        assert result.close == 152.0
+        assert result.amount == 10
+        assert result.performance == {"1d": "1.2%", "1w": "3.4%"}
+        mock_polygon.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_updated_stock_served_from_snapshot_when_redis_down(test_db, sample_stock_data, tmp_path):
+    """Test that a market data update keeps an old row fresh for the snapshot fallback"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create({**sample_stock_data, "updated_at": datetime(2020, 1, 1)})
+    await repository.update_market_data("AAPL", {"close": 160.0})
+    path = str(tmp_path / "quotes.snapshot")
+    await write_quote_snapshot(repository, path)
+    
+    with patch('app.services.stock.cache_service') as mock_cache, \
+         patch('app.services.stock.quote_snapshot', QuoteSnapshot(path)), \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon:
+        mock_cache.get_many = AsyncMock(side_effect=CacheException("Redis unavailable"))
+        
+        result = await service.get_stock("AAPL")
+        
+        assert result.close == 160.0
+        mock_polygon.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_stock_rejects_symbol_missing_from_index(test_db):
+    """Test symbols absent from a loaded reference index are rejected locally"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    
+    with patch('app.services.stock.symbol_index') as mock_index, \
+         patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close') as mock_polygon:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_index.refresh = AsyncMock(return_value=False)
+        mock_index.loaded = True
+        mock_index.contains.return_value = False
+        
+        with pytest.raises(StockNotFoundException):
+            await service.get_stock("ZZZZ")
+        
+        mock_polygon.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_stock_serves_stored_symbol_missing_from_index(test_db, sample_stock_data):
+    """Test a stored or held symbol is still served when the reference CSV lacks it"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    
+    with patch('app.services.stock.symbol_index') as mock_index, \
+         patch('app.services.stock.cache_service') as mock_cache, \
+         patch.object(service.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(service.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw:
+        mock_cache.get_many = AsyncMock(return_value=[None, None])
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_index.refresh = AsyncMock(return_value=False)
+        mock_index.loaded = True
+        mock_index.contains.return_value = False
+        mock_polygon.side_effect = ExternalAPIException("Polygon", "HTTP 502")
+        mock_mw.side_effect = ExternalAPIException("MarketWatch", "HTTP 502")
+        
+        result = await service.get_stock("AAPL")
+        
+        assert result.symbol == "AAPL"
+        assert result.close == 152.0
+        assert result.amount == 10
+
+@pytest.mark.asyncio
+async def test_portfolio_service_values_positions(test_db, sample_stock_data):
+    """Test portfolio totals are computed on a miss and cached with a safety TTL"""
+    repository = StockRepository(test_db)
+    service = PortfolioService(repository)
+    await repository.create(sample_stock_data)
+    await repository.create({"symbol": "MSFT", "close": 400.0, "amount": 2})
+    
+    with patch('app.services.portfolio.cache_service') as mock_cache:
+        mock_cache.get = AsyncMock(return_value=None)
+        mock_cache.set = AsyncMock(return_value=True)
+        
+        result = await service.get_portfolio()
+        
+        assert result.position_count == 2
+        assert result.total_value == 2320.0
+        mock_cache.set.assert_awaited_once_with(PORTFOLIO_CACHE_KEY, result.model_dump(), ttl=settings.CACHE_TTL)
+
+@pytest.mark.asyncio
+async def test_update_stock_amount_invalidates_portfolio(test_db, sample_stock_data):
+    """Test changing a holding drops the cached portfolio"""
+    repository = StockRepository(test_db)
+    service = StockService(repository)
+    await repository.create(sample_stock_data)
+    
+    with patch('app.services.portfolio.cache_service') as mock_cache:
+        mock_cache.delete = AsyncMock(return_value=True)
+        
+        await service.update_stock_amount("AAPL", 5)
+        
+        mock_cache.delete.assert_awaited_once_with(PORTFOLIO_CACHE_KEY)
+
+@pytest.mark.asyncio
+async def test_screener_service_pages_with_cursor(test_db):
+    """Test the screener walks every row exactly once through next_cursor"""
+    repository = StockRepository(test_db)
+    service = ScreenerService(repository)
+    for i, symbol in enumerate(["AAA", "BBB", "CCC", "DDD", "EEE"]):
+        await repository.create({"symbol": symbol, "volume": 1000 - i % 2, "performance": "{}"})
+    
+    seen = []
+    cursor = None
+    while True:
+        page = await service.screen(ScreenerQuery(sort="volume", order="desc", limit=2, cursor=cursor))
+        seen.extend(item.symbol for item in page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    
+    assert seen == ["EEE", "CCC", "AAA", "DDD", "BBB"]
+
+@pytest.mark.asyncio
+async def test_screener_service_rejects_bad_cursor(test_db):
+    """Test malformed cursors are reported as client errors"""
+    service = ScreenerService(StockRepository(test_db))
+    
+    with pytest.raises(InvalidQueryException):
+        await service.screen(ScreenerQuery(cursor="not-a-cursor"))
+    # Well-formed JSON of the wrong shape is rejected before it reaches the query
+    for sort, values in (("price", [[], []]), ("price", [True, "AAA"]), ("price", [1.0, None]), ("symbol", [100, "AAA"])):
+        with pytest.raises(InvalidQueryException):
+            await service.screen(ScreenerQuery(sort=sort, cursor=encode_cursor(values)))
+
+def test_screener_api_validates_query_bounds():
+    """Test out-of-range screener parameters are rejected as 422 instead of failing inside the dependency"""
+    client = TestClient(app)
+    
+    for params in ({"min_volume": -1}, {"limit": 1000}, {"limit": 0}, {"sort": "name"}):
+        assert client.get("/screener", params=params).status_code == 422
+
+@pytest.mark.asyncio
+async def test_export_service_gzip_and_resume(test_db):
+    """Test the gzip NDJSON export decodes completely and resumes from a record's cursor"""
+    repository = StockRepository(test_db)
+    for symbol in ["AAA", "BBB", "CCC"]:
+        await repository.create({"symbol": symbol, "close": 10.0, "amount": 1, "performance": "{}"})
+    service = ExportService(TestAsyncSessionLocal, chunk_size=2)
+    
+    body = b"".join([chunk async for chunk in service.stream("ndjson", compress=True)])
+    records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    assert [record["symbol"] for record in records] == ["AAA", "BBB", "CCC"]
+    
+    after = service.resume_after(records[0]["cursor"])
+    body = b"".join([chunk async for chunk in service.stream("csv", after)])
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert [row["symbol"] for row in rows] == ["BBB", "CCC"]
+    assert rows[0]["close"] == "10.0"
+    
+    with pytest.raises(InvalidQueryException):
+        service.resume_after("not-a-cursor")
+
+
+def test_export_gzip_negotiation_honours_q_values():
+    """Test gzip is only chosen when Accept-Encoding allows it with a non-zero quality"""
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("deflate;q=0.5, GZIP;q=0.8")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.0, identity")
+    assert not accepts_gzip("*;q=1, gzip;q=0")
+    assert not accepts_gzip("")
@@ -0,0 +1,57 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+from app.snapshot import QuoteSnapshot, write_snapshot
+from app.services.stock import snapshot_is_fresh
+
+QUOTE = {"symbol": "AAPL", "close": 152.0, "from": "2024-01-10", "performance": {"5_day": "+1.0%"}}
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that written quotes are read back through the memory map"""
+    path = str(tmp_path / "quotes.snapshot")
+    write_snapshot(path, {"AAPL": QUOTE, "MSFT": {**QUOTE, "symbol": "MSFT"}})
+    
+    snapshot = QuoteSnapshot(path)
+    
+    assert snapshot.load() == 2
+    assert snapshot.get("aapl") == QUOTE
+    assert snapshot.get("TSLA") is None
+
+@pytest.mark.asyncio
+async def test_snapshot_refresh_picks_up_replaced_file(tmp_path):
+    """Test that a rewritten snapshot is remapped on refresh"""
+    path = str(tmp_path / "quotes.snapshot")
+    write_snapshot(path, {"AAPL": QUOTE})
+    snapshot = QuoteSnapshot(path, reload_interval=0)
+    snapshot.load()
+    
+    write_snapshot(path, {"AAPL": {**QUOTE, "close": 160.0}})
+    os.utime(path, (0, os.path.getmtime(path) + 1))
+    
+    assert await snapshot.refresh()
+    assert snapshot.get("AAPL")["close"] == 160.0
+
+def test_snapshot_missing_or_corrupt(tmp_path):
+    """Test that an absent or foreign file leaves the snapshot empty instead of failing"""
+    path = tmp_path / "quotes.snapshot"
+    snapshot = QuoteSnapshot(str(path))
+    
+    assert snapshot.load() == 0
+    path.write_bytes(b"not a snapshot at all")
+    assert snapshot.load() == 0
+    assert snapshot.get("AAPL") is None
+
+def test_snapshot_freshness():
+    """Test that stale quotes are only served when they hold the latest completed session's close"""
+    now = datetime(2024, 1, 17, 16, 0)  # 11:00 in New York, market open
+    recent = {**QUOTE, "from": "2024-01-12", "updated_at": (now - timedelta(minutes=5)).isoformat()}
+    stale = {**recent, "updated_at": (now - timedelta(hours=2)).isoformat()}
+    
+    assert snapshot_is_fresh(recent, now)
+    assert not snapshot_is_fresh(stale, now)
+    # During the session the previous day's bar is still the newest there is
+    assert snapshot_is_fresh({**stale, "from": "2024-01-16"}, now)
+    # Overnight the previous session's close cannot change
+    overnight = {**stale, "from": "2024-01-16", "updated_at": "2024-01-16T21:30:00"}
+    assert snapshot_is_fresh(overnight, datetime(2024, 1, 17, 3, 0))
+    assert not snapshot_is_fresh({**overnight, "from": "2024-01-12"}, datetime(2024, 1, 17, 3, 0))
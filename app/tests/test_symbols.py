@@ -0,0 +1,95 @@
+import os
+import pytest
+from app.symbols import SymbolIndex, is_valid_symbol
+
+@pytest.fixture
+def symbols_file(tmp_path):
+    """Small ticker reference file"""
+    path = tmp_path / "symbols.csv"
+    path.write_text(
+        "symbol,name\n"
+        "AAPL,Apple Inc.\n"
+        "AMZN,Amazon.com Inc.\n"
+        "AAL,American Airlines Group Inc.\n"
+        "BRK.B,Berkshire Hathaway Inc.\n"
+        "MSFT,Microsoft Corp.\n"
+        "not a symbol,Ignored\n"
+    )
+    return path
+
+def test_is_valid_symbol():
+    """Test the local symbol format check"""
+    assert is_valid_symbol("aapl")
+    assert is_valid_symbol("BRK.B")
+    assert not is_valid_symbol("")
+    assert not is_valid_symbol("AAPL; DROP TABLE")
+
+def test_symbol_index_search(symbols_file):
+    """Test prefix search returns sorted matches up to the limit"""
+    index = SymbolIndex(str(symbols_file))
+    
+    assert index.load() == 5
+    
+    assert index.search("a") == [
+        ("AAL", "American Airlines Group Inc."),
+        ("AAPL", "Apple Inc."),
+        ("AMZN", "Amazon.com Inc."),
+    ]
+    assert [symbol for symbol, _ in index.search("AA", limit=1)] == ["AAL"]
+    assert index.search("X") == []
+
+def test_symbol_index_contains(symbols_file):
+    """Test membership checks"""
+    index = SymbolIndex(str(symbols_file))
+    index.load()
+    
+    assert index.contains("msft")
+    assert index.contains("BRK.B")
+    assert not index.contains("ZZZZ")
+
+def test_symbol_index_missing_file(tmp_path):
+    """Test a missing reference file leaves the index disabled"""
+    index = SymbolIndex(str(tmp_path / "missing.csv"))
+    
+    assert index.load() == 0
+    assert not index.loaded
+
+@pytest.mark.asyncio
+async def test_symbol_index_refresh(symbols_file):
+    """Test the index picks up file changes without a restart"""
+    index = SymbolIndex(str(symbols_file), reload_interval=0)
+    index.load()
+    
+    assert not await index.refresh()
+    
+    symbols_file.write_text("symbol,name\nNVDA,NVIDIA Corp.\n")
+    stat = os.stat(symbols_file)
+    os.utime(symbols_file, (stat.st_atime, stat.st_mtime + 10))
+    
+    assert await index.refresh()
+    assert index.contains("NVDA")
+    assert not index.contains("AAPL")
+
+def test_load_symbols_builds_reference_file(tmp_path):
+    """Test the loader merges Nasdaq Trader directory files into a file the index loads"""
+    from app.load_symbols import build_symbols
+    nasdaq = tmp_path / "nasdaqlisted.txt"
+    nasdaq.write_text(
+        "Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares\n"
+        "AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N\n"
+        "ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N\n"
+        "File Creation Time: 1017202521:32|||||||\n"
+    )
+    other = tmp_path / "otherlisted.txt"
+    other.write_text(
+        "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+        "BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B\n"
+        "ABR$D|Arbor Realty Trust Preferred|N|ABRpD|N|100|N|ABR-D\n"
+        "File Creation Time: 1017202521:32|||||||\n"
+    )
+    output = tmp_path / "data" / "symbols.csv"
+    
+    assert build_symbols([str(nasdaq), str(other)], str(output)) == 2
+    index = SymbolIndex(str(output))
+    assert index.load() == 2
+    assert index.contains("BRK.B") and not index.contains("ZXZZT")
@@ -0,0 +1,72 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware import ProfilingMiddleware, ServerTimingMiddleware
+from app.tracing import server_timing, span, start_recording, stop_recording
+
+@pytest.fixture
+def tracing_client():
+    """Minimal app with the timing and profiling middleware"""
+    test_app = FastAPI()
+    test_app.add_middleware(ProfilingMiddleware)
+    test_app.add_middleware(ServerTimingMiddleware)
+
+    @test_app.get("/phases")
+    async def phases():
+        with span("db"):
+            pass
+        with span("db"):
+            pass
+        with span("cache"):
+            pass
+        return {"ok": True}
+
+    with TestClient(test_app) as test_client:
+        yield test_client
+
+def test_span_is_noop_without_recording():
+    """Test spans outside a request record nothing"""
+    with span("db") as first, span("cache") as second:
+        pass
+    
+    assert first is second
+
+def test_spans_are_recorded_and_summed():
+    """Test repeated phases are summed in the header"""
+    spans, token = start_recording()
+    try:
+        with span("db"):
+            pass
+        with span("db"):
+            pass
+    finally:
+        stop_recording(token)
+    
+    assert len(spans) == 2
+    assert server_timing([("db", 0.001), ("db", 0.002)], total=0.005) == "db;dur=3.00, total;dur=5.00"
+
+def test_server_timing_header(tracing_client):
+    """Test requests report their phases in Server-Timing"""
+    header = tracing_client.get("/phases").headers["Server-Timing"]
+    
+    assert [part.split(";")[0] for part in header.split(", ")] == ["db", "cache", "total"]
+
+def test_profiling_requires_admin_token(tracing_client, monkeypatch):
+    """Test profiling is ignored without the configured admin token"""
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    
+    response = tracing_client.get("/phases", headers={"X-Profile": "text", "X-Admin-Token": "wrong"})
+    
+    assert response.json() == {"ok": True}
+
+def test_profiling_report(tracing_client, monkeypatch):
+    """Test an admin can swap a response for a profiler report"""
+    pytest.importorskip("pyinstrument")
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    
+    response = tracing_client.get("/phases", headers={"X-Profile": "text", "X-Admin-Token": "secret"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import text
+from unittest.mock import AsyncMock, patch
+from app.database import Base
+from app.worker import WorkerRuntime
+from app.tasks import _sync_stocks_async
+
+@pytest.fixture
+def runtime(tmp_path):
+    """Runtime on a throwaway database, shut down after the test"""
+    runtime = WorkerRuntime(f"sqlite+aiosqlite:///{tmp_path / 'worker.db'}")
+    yield runtime
+    runtime.shutdown()
+
+def test_runtime_reuses_loop_and_resources(runtime):
+    """Test that tasks share one loop, engine and client set across runs"""
+    async def current():
+        async with runtime.session_factory() as db:
+            await db.execute(text("SELECT 1"))
+        return asyncio.get_running_loop(), runtime.engine, runtime.polygon_service
+    
+    first = runtime.run(current())
+    second = runtime.run(current())
+    
+    assert first == second
+    assert runtime.running
+
+def test_runtime_shutdown_closes_resources(runtime):
+    """Test that shutdown closes clients and stops the loop thread"""
+    runtime.start()
+    polygon_service = runtime.polygon_service
+    thread = runtime._thread
+    
+    with patch.object(polygon_service, 'close', new_callable=AsyncMock) as mock_close:
+        runtime.shutdown()
+    
+    mock_close.assert_awaited_once()
+    assert not runtime.running
+    assert not thread.is_alive()
+    assert runtime.polygon_service is None
+
+def test_runtime_shutdown_leaves_blocked_loop_open(runtime):
+    """Test that shutdown does not close a loop whose thread is still running a task"""
+    async def block():
+        time.sleep(0.5)
+    
+    runtime.start()
+    loop, thread = runtime._loop, runtime._thread
+    asyncio.run_coroutine_threadsafe(block(), loop)
+    
+    runtime.shutdown(timeout=0.05)
+    
+    assert not runtime.running
+    assert not loop.is_closed()
+    # Once the task returns, let the queued aclose finish so nothing is left unawaited
+    thread.join()
+    async def drain():
+        await asyncio.gather(*(task for task in asyncio.all_tasks() if task is not asyncio.current_task()))
+    loop.run_until_complete(drain())
+    loop.close()
+
+def test_runtime_propagates_task_errors(runtime):
+    """Test that an exception in a task reaches the caller and leaves the runtime usable"""
+    async def fail():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError):
+        runtime.run(fail())
+    assert runtime.run(asyncio.sleep(0, result=42)) == 42
+
+def test_sync_uses_runtime_clients(runtime, tmp_path):
+    """Test the sync task runs on the runtime's clients instead of building its own"""
+    runtime.start()
+    runtime.run(_create_tables(runtime))
+    polygon_data = {
+        "symbol": "AAPL", "open": 150.0, "high": 155.0, "low": 149.0, "close": 152.0, "volume": 1000,
+        "after_hours": 152.5, "pre_market": 149.5, "from_date": "2024-01-16", "status": "OK",
+    }
+    
+    with patch.object(runtime.polygon_service, 'get_daily_open_close', new_callable=AsyncMock) as mock_polygon, \
+         patch.object(runtime.marketwatch_service, 'get_performance_data', new_callable=AsyncMock) as mock_mw, \
+         patch('app.tasks.write_quote_snapshot', new_callable=AsyncMock), \
+         patch('app.tasks.market_calendar.is_session_final', return_value=False):
+        mock_polygon.return_value = polygon_data
+        mock_mw.return_value = {"5_day": "+1.0%"}
+        runtime.run(_sync_stocks_async(["AAPL"], runtime))
+    
+    async def stored_close():
+        async with runtime.session_factory() as db:
+            return (await db.execute(text("SELECT close FROM stocks WHERE symbol = 'AAPL'"))).scalar()
+    
+    assert runtime.run(stored_close()) == 152.0
+    assert runtime.polygon_service is not None
+
+async def _create_tables(runtime):
+    async with runtime.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,55 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Spans of the current request; None when recording is off, which keeps span() down to a ContextVar read
+_recorder: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+class _Span:
+    __slots__ = ("name", "recorder", "start")
+
+    def __init__(self, name: str, recorder: List[Tuple[str, float]]):
+        self.name = name
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.append((self.name, time.perf_counter() - self.start))
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name: str):
+    """Time a phase of the current request, e.g. ``with span("db"): ...``"""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NOOP_SPAN
+    return _Span(name, recorder)
+
+def start_recording():
+    recorder: List[Tuple[str, float]] = []
+    return recorder, _recorder.set(recorder)
+
+def stop_recording(token):
+    _recorder.reset(token)
+
+def server_timing(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format spans as a Server-Timing header, summing repeated phases"""
+    durations: Dict[str, float] = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
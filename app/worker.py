@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Coroutine, Optional
+
+from app.cache import CacheService
+from app.database import ASYNC_DATABASE_URL, create_database_engine, create_session_factory
+from app.services.marketwatch import MarketWatchService
+from app.services.polygon import PolygonService
+
+logger = logging.getLogger(__name__)
+
+class WorkerRuntime:
+    """Long-lived async resources for a worker process.
+
+    The database engine, upstream clients and Redis client are bound to the
+    event loop they were first used on. Tasks therefore submit their coroutines
+    to one loop that runs on a background thread for the whole process,
+    instead of building a new loop and a new set of clients per task.
+
+    ``open``/``aclose`` manage the resources on the calling loop; ``start``/
+    ``shutdown`` additionally own the loop thread.
+    """
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or ASYNC_DATABASE_URL
+        self.engine = None
+        self.session_factory = None
+        self.polygon_service: Optional[PolygonService] = None
+        self.marketwatch_service: Optional[MarketWatchService] = None
+        self.cache: Optional[CacheService] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._pid == os.getpid()
+
+    async def open(self):
+        self.engine = create_database_engine(self.database_url)
+        self.session_factory = create_session_factory(self.engine)
+        self.polygon_service = PolygonService()
+        self.marketwatch_service = MarketWatchService()
+        self.cache = CacheService()
+
+    async def aclose(self):
+        for name, close in (
+            ("polygon", self.polygon_service and self.polygon_service.close),
+            ("marketwatch", self.marketwatch_service and self.marketwatch_service.close),
+            ("cache", self.cache and self.cache.close),
+            ("database", self.engine and self.engine.dispose),
+        ):
+            if close is None:
+                continue
+            try:
+                await close()
+            except Exception as e:
+                logger.error(f"Error closing worker {name} resources: {e}")
+        self.engine = self.session_factory = None
+        self.polygon_service = self.marketwatch_service = self.cache = None
+
+    def start(self):
+        """Start the loop thread and open resources on it; idempotent, and restarts after a fork"""
+        with self._lock:
+            if self.running:
+                return
+            # A forked child inherits the parent's objects but not its loop thread; drop them unclosed,
+            # closing would act on the parent's sockets
+            self.engine = self.session_factory = None
+            self.polygon_service = self.marketwatch_service = self.cache = None
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="worker-runtime", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self.open(), loop).result()
+            except BaseException:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+                raise
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            logger.info("Worker async runtime started")
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result"""
+        if not self.running:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float = 30.0):
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+            try:
+                asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout)
+            except FutureTimeoutError:
+                logger.warning(f"Worker resources were not closed within {timeout}s")
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join(timeout)
+                self._loop = self._thread = self._pid = None
+                if thread.is_alive():
+                    # A task is still blocking the loop; it is a daemon thread, so the process exits without it
+                    logger.warning(f"Worker runtime loop did not stop within {timeout}s, leaving it unclosed")
+                else:
+                    loop.close()
+            logger.info("Worker async runtime stopped")
+
+worker_runtime = WorkerRuntime()
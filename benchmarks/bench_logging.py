@@ -0,0 +1,88 @@
+"""Event-loop blocking caused by logging on the request path.
+
+Logs from concurrent coroutines while a probe coroutine measures how late the
+event loop wakes it up. The sink simulates a slow stderr (e.g. a container log
+pipe under backpressure). Compares a plain StreamHandler, as set up by
+logging.basicConfig, with app.logging_config.configure_logging.
+
+Usage: python -m benchmarks.bench_logging [--records 2000] [--write-delay-ms 0.2]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from app import logging_config
+from app.config import settings
+
+class SlowStream:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text: str):
+        time.sleep(self.delay)
+        self.lines += text.count("\n")
+
+    def flush(self):
+        pass
+
+async def probe(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+async def produce(records: int, workers: int):
+    logger = logging.getLogger("app.bench")
+    per_worker = records // workers
+
+    async def worker(n: int):
+        for i in range(per_worker):
+            logger.info("request %s/%s handled", n, i)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker(n) for n in range(workers)))
+
+async def measure(records: int, workers: int):
+    stop = asyncio.Event()
+    lags = []
+    probe_task = asyncio.create_task(probe(stop, lags))
+    start = time.perf_counter()
+    await produce(records, workers)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    lags.sort()
+    return elapsed, lags[len(lags) // 2] if lags else 0.0, lags[-1] if lags else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--write-delay-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    sink = SlowStream(args.write_delay_ms / 1000)
+
+    root.handlers = [logging.StreamHandler(sink)]
+    root.setLevel(logging.INFO)
+    direct = asyncio.run(measure(args.records, args.workers))
+
+    settings.LOG_RATE_LIMIT_BURST = 0
+    original_stderr, sys.stderr = sys.stderr, sink
+    try:
+        logging_config.configure_logging()
+        queued = asyncio.run(measure(args.records, args.workers))
+        logging_config.stop_logging()
+    finally:
+        sys.stderr = original_stderr
+
+    for name, (elapsed, p50, worst) in (("StreamHandler", direct), ("QueueHandler", queued)):
+        print(f"{name:<14} loop time {elapsed * 1000:8.1f} ms   probe lag p50 {p50 * 1000:6.2f} ms   max {worst * 1000:6.2f} ms")
+    print(f"lines written: {sink.lines}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""In-process requests/second for the error/timing middleware.
+
+Compares the pure ASGI ErrorHandlingMiddleware against the previous
+BaseHTTPMiddleware implementation on /health and on a cached /stock/{symbol}
+hit. Requests are driven straight through the ASGI interface, so the numbers
+reflect server-side overhead only.
+
+Usage: python -m benchmarks.bench_middleware [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.exceptions import StockAPIException
+from app.main import app as asgi_app
+from app.database import init_schema
+
+class LegacyErrorHandlingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against"""
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except StockAPIException as e:
+            return JSONResponse(status_code=e.status_code, content={"error": True, "message": e.message, "type": e.__class__.__name__})
+        except HTTPException as e:
+            return JSONResponse(status_code=e.status_code, content={"error": True, "message": e.detail, "type": "HTTPException"})
+        except Exception:
+            return JSONResponse(status_code=500, content={"error": True, "message": "Internal server error", "type": "InternalServerError"})
+
+def build_legacy_app() -> FastAPI:
+    legacy = FastAPI()
+    legacy.add_middleware(LegacyErrorHandlingMiddleware)
+    for route in asgi_app.router.routes:
+        legacy.router.routes.append(route)
+    return legacy
+
+class MemoryCache:
+    """Stand-in for CacheService so cache hits do not depend on a Redis server"""
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def get_many(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+        return True
+
+async def call(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            response_done.set()
+
+    await app(scope, receive, send)
+    return status
+
+async def run(app, path: str, requests: int, concurrency: int) -> float:
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status = await call(app, path)
+            assert status == 200, f"{path} returned {status}"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+async def main(args):
+    from app.services import stock as stock_module
+
+    await init_schema()
+    cache = MemoryCache()
+    stock_module.cache_service = cache
+    await cache.set("stock:AAPL", {"symbol": "AAPL", "close": 150.0, "performance": {}})
+
+    apps = {"BaseHTTPMiddleware": build_legacy_app(), "pure ASGI": asgi_app}
+    for path in ("/health", "/stock/AAPL"):
+        for name, app in apps.items():
+            await run(app, path, min(args.requests, 500), args.concurrency)
+            rps = await run(app, path, args.requests, args.concurrency)
+            print(f"{path:<14} {name:<20} {rps:>10.0f} req/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    logging.disable(logging.INFO)
+    asyncio.run(main(parser.parse_args()))
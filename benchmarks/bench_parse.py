@@ -0,0 +1,94 @@
+"""MarketWatch parse time over a recorded upstream corpus.
+
+Runs MarketWatchService.parse_performance on every recorded MarketWatch page,
+offline, and reports per-page latency. Pages that parse to nothing are
+counted, since a faster parser that finds no data is not an improvement.
+The corpus defaults to the bundled synthetic one, which the committed baseline
+was measured on.
+
+Usage: python -m benchmarks.bench_parse [--corpus PATH] [--rounds 20] [--save-baseline | --compare]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.config import settings
+from app.recording import UpstreamCorpus, decode_body
+from app.services.marketwatch import MarketWatchService
+from benchmarks.record_corpus import BUNDLED_CORPUS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "parse.json")
+
+def marketwatch_pages(corpus: UpstreamCorpus):
+    prefix = httpx.URL(settings.MARKETWATCH_BASE_URL).path
+    return [
+        decode_body(entry) for entry in corpus.entries()
+        if entry["status"] == 200 and httpx.URL(entry["key"].split(" ", 1)[1]).path.startswith(prefix)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=BUNDLED_CORPUS)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    pages = marketwatch_pages(UpstreamCorpus(args.corpus).load())
+    if not pages:
+        sys.exit(f"no MarketWatch pages in {args.corpus}; record some with benchmarks.record_corpus")
+
+    empty = sum(1 for page in pages if not MarketWatchService.parse_performance(page))
+    timings = []
+    for _ in range(args.rounds):
+        for page in pages:
+            start = time.perf_counter()
+            MarketWatchService.parse_performance(page)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    total_mb = sum(map(len, pages)) * args.rounds / 1e6
+    result = {
+        "pages": len(pages),
+        "empty": empty,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)], 3),
+        "mb_per_s": round(total_mb / (sum(timings) / 1000), 2),
+    }
+    print(
+        f"{result['pages']} pages x {args.rounds} rounds  mean {result['mean_ms']:.2f} ms  "
+        f"p50 {result['p50_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms  {result['mb_per_s']:.1f} MB/s  "
+        f"empty {result['empty']}"
+    )
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{key} {result[key]} > baseline {baseline[key]}"
+            for key in ("mean_ms", "p95_ms") if result[key] > baseline[key] * (1 + args.tolerance)
+        ]
+        if result["empty"] > baseline["empty"]:
+            regressions.append(f"{result['empty']} pages parsed to nothing, baseline {baseline['empty']}")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+if __name__ == "__main__":
+    main()
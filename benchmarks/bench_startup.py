@@ -0,0 +1,125 @@
+"""Cold-start cost of the API: import time and time to first response.
+
+Import time is measured in fresh interpreters. Time to first response runs
+uvicorn in a subprocess and polls /health until it answers. It is measured
+twice: against a new database, where the schema is created, and against one
+whose schema version marker already matches.
+
+Usage: python -m benchmarks.bench_startup [--rounds 5] [--save-baseline | --compare]
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+from benchmarks.fakes import free_port
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "startup.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_PROBE = (
+    "import time, sys\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "print(time.perf_counter() - start)\n"
+    "print(sorted(name for name in ('bs4', 'redis', 'celery', 'pyinstrument') if name in sys.modules))\n"
+)
+
+def import_time(env) -> Tuple[float, str]:
+    """Milliseconds to import app.main, and which optional heavy modules it pulled in"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(output[0]) * 1000, output[1]
+
+def healthy(port: int) -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1.0)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+def first_response(env, timeout: float = 60.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, cwd=ROOT
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            if healthy(port):
+                return (time.perf_counter() - start) * 1000
+            time.sleep(0.005)
+        raise RuntimeError("API server did not become healthy")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "PYTHONPATH": ROOT,
+            "SYMBOLS_FILE": os.path.join(tmp, "no-symbols.csv"),
+            "QUOTE_SNAPSHOT_FILE": os.path.join(tmp, "quotes.snapshot"),
+            "LOG_LEVEL": "WARNING",
+        }
+        imports = [import_time({**env, "DATABASE_URL": f"sqlite:///{tmp}/import.db"}) for _ in range(args.rounds)]
+        fresh, existing = [], []
+        for i in range(args.rounds):
+            db_env = {**env, "DATABASE_URL": f"sqlite:///{tmp}/startup-{i}.db"}
+            fresh.append(first_response(db_env))
+            existing.append(first_response(db_env))
+
+    result = {
+        "import_ms": round(statistics.median(ms for ms, _ in imports), 1),
+        "first_response_new_db_ms": round(statistics.median(fresh), 1),
+        "first_response_existing_db_ms": round(statistics.median(existing), 1),
+    }
+    print(f"{args.rounds} rounds, medians")
+    print(f"import app.main              {result['import_ms']:>8.1f} ms  (optional modules loaded: {imports[0][1]})")
+    print(f"first response, new db       {result['first_response_new_db_ms']:>8.1f} ms")
+    print(f"first response, existing db  {result['first_response_existing_db_ms']:>8.1f} ms")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{key} {value} > baseline {baseline[key]}"
+            for key, value in result.items() if key in baseline and value > baseline[key] * (1 + args.tolerance)
+        ]
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Lookup latency of the local symbol index at reference-data scale.
+
+Usage: python -m benchmarks.bench_symbols [--symbols 150000]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import string
+import tempfile
+import time
+
+from app.symbols import SymbolIndex
+
+def generate_symbols(count: int):
+    letters = string.ascii_uppercase
+    symbols = set()
+    for length in range(1, 6):
+        for combo in itertools.product(letters, repeat=length):
+            symbols.add("".join(combo))
+            if len(symbols) >= count:
+                return sorted(symbols)
+    return sorted(symbols)
+
+def per_call_ns(func, args, repeat: int) -> float:
+    start = time.perf_counter_ns()
+    for arg in itertools.islice(itertools.cycle(args), repeat):
+        func(arg)
+    return (time.perf_counter_ns() - start) / repeat
+
+async def refresh_ns(index: SymbolIndex, repeat: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        await index.refresh()
+    return (time.perf_counter_ns() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=150_000)
+    parser.add_argument("--repeat", type=int, default=200_000)
+    args = parser.parse_args()
+
+    symbols = generate_symbols(args.symbols)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "symbols.csv")
+        with open(path, "w") as f:
+            f.write("symbol,name\n")
+            f.writelines(f"{symbol},{symbol} Corp\n" for symbol in symbols)
+
+        index = SymbolIndex(path, reload_interval=0)
+        start = time.perf_counter()
+        index.load()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(42)
+        hits = rng.sample(symbols, 1000)
+        misses = [f"{symbol}Q9" for symbol in hits]
+        prefixes = [symbol[:2] for symbol in hits]
+
+        print(f"symbols loaded:        {len(index)} in {load_ms:.1f} ms")
+        print(f"contains (hit):        {per_call_ns(index.contains, hits, args.repeat):.0f} ns")
+        print(f"contains (miss):       {per_call_ns(index.contains, misses, args.repeat):.0f} ns")
+        print(f"search (prefix, 10):   {per_call_ns(index.search, prefixes, args.repeat // 10) / 1000:.2f} us")
+        print(f"refresh (stat only):   {asyncio.run(refresh_ns(index, 10_000)) / 1000:.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Per-task overhead of the Celery sync: a fresh loop and client set per run vs the worker runtime.
+
+Runs _sync_stocks_async repeatedly against the local fakes with no upstream
+latency, so the difference is setup cost: event loop, SSL contexts for the
+HTTP clients, database engine and Redis connection.
+
+Usage: python -m benchmarks.bench_worker [--runs 20] [--symbols 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import BackgroundServers, UpstreamProfile
+
+def legacy_task(sync, symbols):
+    # What sync_popular_stocks did before the runtime: new loop, new clients, new engine
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(sync(symbols))
+    finally:
+        loop.close()
+
+def timed_runs(func, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--symbols", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, BackgroundServers(UpstreamProfile(latency_ms=0, jitter_ms=0, page_kb=20)) as fakes:
+        # Settings are read at import time, so the app is imported only once the environment points at the fakes
+        os.environ.update(fakes.env)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/worker.db"
+        os.environ["QUOTE_SNAPSHOT_FILE"] = os.path.join(tmp, "quotes.snapshot")
+        os.environ["LOG_LEVEL"] = "WARNING"
+        from app.database import create_tables
+        from app.logging_config import configure_logging
+        from app.tasks import _sync_stocks_async
+        from app.worker import WorkerRuntime
+
+        configure_logging()
+        create_tables()
+        symbols = [f"W{i:04d}" for i in range(args.symbols)]
+        runtime = WorkerRuntime()
+        try:
+            results = {
+                "new loop per task": timed_runs(lambda: legacy_task(_sync_stocks_async, symbols), args.runs),
+                "worker runtime": timed_runs(lambda: runtime.run(_sync_stocks_async(symbols, runtime)), args.runs),
+            }
+        finally:
+            runtime.shutdown()
+
+    print(f"{args.runs} runs of {args.symbols} symbols, no upstream latency")
+    for name, timings in results.items():
+        print(f"{name:<18} first {timings[0]:>7.1f} ms  median {statistics.median(timings[1:]):>7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Local stand-ins for Polygon, MarketWatch and Redis used by the benchmarks.
+
+The fakes listen on 127.0.0.1 so a benchmark can point POLYGON_URL,
+MARKETWATCH_BASE_URL and REDIS_URL at them and exercise the real clients end
+to end. Run standalone with ``python -m benchmarks.fakes --help``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    page_kb: int = 200
+    # Symbols with this prefix are unknown to both upstreams (404)
+    unknown_prefix: str = "ZZ"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _delay(profile: UpstreamProfile):
+    await asyncio.sleep(max(0.0, random.gauss(profile.latency_ms, profile.jitter_ms)) / 1000)
+
+def polygon_app(profile: UpstreamProfile) -> Starlette:
+    async def open_close(request: Request):
+        await _delay(profile)
+        symbol = request.path_params["symbol"].upper()
+        if symbol.startswith(profile.unknown_prefix):
+            return JSONResponse({"status": "NOT_FOUND", "message": "Data not found."}, status_code=404)
+        if random.random() < profile.error_rate:
+            return JSONResponse({"status": "ERROR", "message": "Internal error"}, status_code=502)
+        base = 50 + sum(map(ord, symbol)) % 400
+        return JSONResponse({
+            "status": "OK", "from": request.path_params["date"], "symbol": symbol,
+            "open": base, "high": base * 1.02, "low": base * 0.98, "close": base * 1.01,
+            "volume": 1_000_000 + base, "afterHours": base * 1.011, "preMarket": base * 0.999,
+        })
+
+    return Starlette(routes=[Route("/v1/open-close/{symbol}/{date}", open_close)])
+
+def marketwatch_page(symbol: str, page_kb: int) -> str:
+    rows = "".join(
+        f"<tr><td>{window}</td><td>{change:+.2f}%</td></tr>"
+        for window, change in (("5 Day", 1.23), ("1 Month", -2.5), ("3 Month", 4.75), ("YTD", 12.0), ("1 Year", 30.4))
+    )
+    filler = "<div class='filler'><p>" + "x" * 1000 + "</p></div>"
+    padding = filler * max(0, page_kb)
+    return (
+        f"<html><head><title>{symbol}</title></head><body>{padding}"
+        f"<div class='element element--table performance'><table>{rows}</table></div>"
+        f"{padding}</body></html>"
+    )
+
+def marketwatch_app(profile: UpstreamProfile) -> Starlette:
+    pages: Dict[str, str] = {}
+
+    async def stock_page(request: Request):
+        await _delay(profile)
+        symbol = request.path_params["symbol"].upper()
+        if symbol.startswith(profile.unknown_prefix):
+            return HTMLResponse("<html>not found</html>", status_code=404)
+        if random.random() < profile.error_rate:
+            return HTMLResponse("<html>error</html>", status_code=503)
+        if symbol not in pages:
+            pages[symbol] = marketwatch_page(symbol, profile.page_kb // 2)
+        return HTMLResponse(pages[symbol])
+
+    return Starlette(routes=[Route("/investing/stock/{symbol}", stock_page)])
+
+class FakeRedis:
+    """Minimal RESP2 server covering the commands redis-py and CacheService use"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args) -> bytes:
+        command = args[0].upper()
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command in (b"SELECT", b"CLIENT", b"FLUSHALL", b"FLUSHDB"):
+            if command in (b"FLUSHALL", b"FLUSHDB"):
+                self.data.clear()
+            return b"+OK\r\n"
+        if command == b"GET":
+            return bulk(self._get(args[1]))
+        if command == b"MGET":
+            values = [self._get(key) for key in args[1:]]
+            return b"*%d\r\n" % len(values) + b"".join(bulk(value) for value in values)
+        if command == b"SET":
+            expires_at = None
+            if len(args) >= 5 and args[3].upper() == b"EX":
+                expires_at = time.monotonic() + int(args[4])
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == b"SETEX":
+            self.data[args[1]] = (args[3], time.monotonic() + int(args[2]))
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command '%s'\r\n" % command
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                count = int(line[1:].strip())
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readline())[1:].strip())
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(args))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+class _Server(uvicorn.Server):
+    # Several servers share one loop here; serve() installs a single SIGTERM handler for all of them
+    def install_signal_handlers(self):
+        pass
+
+async def serve(profile: UpstreamProfile, polygon_port: int, marketwatch_port: int, redis_port: int):
+    servers = [
+        _Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+        for app, port in ((polygon_app(profile), polygon_port), (marketwatch_app(profile), marketwatch_port))
+    ]
+    def shutdown():
+        for server in servers:
+            server.should_exit = True
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown)
+    redis_server = await asyncio.start_server(FakeRedis().handle, "127.0.0.1", redis_port)
+    async with redis_server:
+        await asyncio.gather(*(server.serve() for server in servers))
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"fake server on port {port} did not start")
+
+class BackgroundServers:
+    """Runs the fakes in a separate process so they do not share a GIL with the load generator"""
+
+    def __init__(self, profile: UpstreamProfile):
+        self.profile = profile
+        self.polygon_port = free_port()
+        self.marketwatch_port = free_port()
+        self.redis_port = free_port()
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def env(self) -> Dict[str, str]:
+        return {
+            "POLYGON_URL": f"http://127.0.0.1:{self.polygon_port}/v1/open-close",
+            "MARKETWATCH_BASE_URL": f"http://127.0.0.1:{self.marketwatch_port}/investing/stock",
+            "REDIS_URL": f"redis://127.0.0.1:{self.redis_port}",
+        }
+
+    def start(self):
+        profile = self.profile
+        self._process = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.fakes",
+            "--polygon-port", str(self.polygon_port),
+            "--marketwatch-port", str(self.marketwatch_port),
+            "--redis-port", str(self.redis_port),
+            "--latency-ms", str(profile.latency_ms),
+            "--jitter-ms", str(profile.jitter_ms),
+            "--error-rate", str(profile.error_rate),
+            "--page-kb", str(profile.page_kb),
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        for port in (self.polygon_port, self.marketwatch_port, self.redis_port):
+            wait_for_port(port)
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=30)
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--polygon-port", type=int, default=8101)
+    parser.add_argument("--marketwatch-port", type=int, default=8102)
+    parser.add_argument("--redis-port", type=int, default=6380)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-kb", type=int, default=200)
+    args = parser.parse_args()
+    profile = UpstreamProfile(args.latency_ms, args.jitter_ms, args.error_rate, args.page_kb)
+    asyncio.run(serve(profile, args.polygon_port, args.marketwatch_port, args.redis_port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""End-to-end load test of the real API against local upstream stand-ins.
+
+Starts fake Polygon, MarketWatch and Redis servers (benchmarks/fakes.py), runs
+the API under uvicorn in a subprocess pointed at them with a scratch SQLite
+database, then drives each scenario at a fixed concurrency and reports
+throughput and p50/p95/p99 latency.
+
+    python -m benchmarks.loadtest                          # run and print
+    python -m benchmarks.loadtest --save-baseline          # record benchmarks/baselines/loadtest.json
+    python -m benchmarks.loadtest --compare --tolerance 0.2  # exit 1 on regression
+    python -m benchmarks.loadtest --replay                 # upstreams served from UPSTREAM_CORPUS instead of the fakes
+
+With --replay the API runs with UPSTREAM_MODE=replay, and the scenarios cycle
+through the symbols the corpus has successful Polygon recordings for.
+cache_miss only misses while there are unrequested symbols left, so a corpus
+much smaller than the request count mostly measures cache hits.
+
+Scenarios:
+    cache_hit   GET /stock/{symbol} for an already cached symbol
+    cache_miss  GET /stock/{symbol} for a new symbol each request (both upstreams called)
+    post        POST /stock/{symbol} adding holdings
+    batch       one Celery sync run (_sync_stocks_async) over --batch-size symbols
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+from app.recording import UpstreamCorpus
+from benchmarks.fakes import BackgroundServers, UpstreamProfile, free_port
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "loadtest.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_POLYGON_SYMBOL = re.compile(r"/v1/open-close/([^/]+)/")
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+async def drive(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> Dict[str, float]:
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+def recorded_symbols(path: str) -> List[str]:
+    """Symbols with a successful Polygon recording in the corpus, in a stable order"""
+    symbols = set()
+    for entry in UpstreamCorpus(path).load().entries():
+        match = _POLYGON_SYMBOL.search(entry["key"])
+        if match and entry["status"] < 400:
+            symbols.add(match.group(1))
+    return sorted(symbols)
+
+def symbol_for(prefix: str, i: int, pool: Optional[List[str]] = None) -> str:
+    """Synthetic symbol for the fakes, or the i-th corpus symbol (cycling) when replaying"""
+    if pool:
+        return pool[i % len(pool)]
+    return f"{prefix}{i:06d}"
+
+async def run_http_scenarios(base_url: str, args) -> Dict[str, Dict[str, float]]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        pool = args.pool
+        hot = list(dict.fromkeys(symbol_for("H", i, pool) for i in range(20)))
+        for symbol in hot:
+            await client.get(f"/stock/{symbol}")
+
+        scenarios = {
+            "cache_hit": lambda c, i: c.get(f"/stock/{hot[i % len(hot)]}"),
+            "cache_miss": lambda c, i: c.get(f"/stock/{symbol_for('M', i + len(hot), pool)}"),
+            "post": lambda c, i: c.post(f"/stock/{symbol_for('P', i % 500, pool)}", json={"amount": 1}),
+        }
+        for name in args.scenarios:
+            if name not in scenarios:
+                continue
+            requests = args.requests if name != "cache_miss" else max(args.concurrency, args.requests // 5)
+            results[name] = await drive(client, scenarios[name], requests, args.concurrency)
+            print(f"{name:<11} {format_result(results[name])}", flush=True)
+    return results
+
+def run_batch(env: Dict[str, str], args) -> Dict[str, float]:
+    """Time one sync run in a fresh interpreter so it reads the benchmark environment"""
+    symbols = [symbol_for("B", i, args.pool) for i in range(args.batch_size)]
+    code = (
+        "import asyncio, json, time\n"
+        "from app.database import create_tables\n"
+        "from app.tasks import _sync_stocks_async\n"
+        "create_tables()\n"
+        f"symbols = {symbols!r}\n"
+        "start = time.perf_counter()\n"
+        "asyncio.run(_sync_stocks_async(symbols))\n"
+        "print(json.dumps(time.perf_counter() - start))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed = json.loads(output.strip().splitlines()[-1])
+    # The sync logs and skips symbols it could not fetch, so a failure shows up as a missing row
+    with sqlite3.connect(env["DATABASE_URL"].replace("sqlite:///", "", 1)) as db:
+        placeholders = ",".join("?" * len(set(symbols)))
+        stored = db.execute(f"SELECT COUNT(*) FROM stocks WHERE symbol IN ({placeholders})", sorted(set(symbols))).fetchone()[0]
+    result = {
+        "requests": args.batch_size,
+        "errors": len(set(symbols)) - stored,
+        "rps": round(args.batch_size / elapsed, 1),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+    print(
+        f"{'batch':<11} {args.batch_size} symbols in {result['total_ms']} ms ({result['rps']} symbols/s)  errors {result['errors']}",
+        flush=True
+    )
+    return result
+
+def format_result(result: Dict[str, float]) -> str:
+    return (
+        f"{result['rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+        f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+    )
+
+def wait_for_health(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("API server did not become healthy")
+
+def error_rate(result: Dict[str, float]) -> float:
+    return result["errors"] / result["requests"] if result.get("requests") else 0.0
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        # Failing fast can look like a throughput win, so any rise in the error rate counts, whatever the tolerance
+        if error_rate(result) > error_rate(reference):
+            regressions.append(
+                f"{name}: error rate {error_rate(result):.2%} ({result['errors']}/{result['requests']})"
+                f" > baseline {error_rate(reference):.2%}"
+            )
+        if result["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['rps']} < baseline {reference['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if reference.get(key) and result[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {result[key]} > baseline {reference[key]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=["cache_hit", "cache_miss", "post", "batch"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake upstream error rate (0-1)")
+    parser.add_argument("--page-kb", type=int, default=200, help="size of fake MarketWatch pages")
+    parser.add_argument("--replay", action="store_true", help="serve the upstreams from the corpus (UPSTREAM_MODE=replay)")
+    parser.add_argument("--corpus", default=settings.UPSTREAM_CORPUS, help="corpus for --replay")
+    parser.add_argument("--replay-delay-scale", type=float, default=1.0, help="UPSTREAM_REPLAY_DELAY_SCALE for --replay")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+    args.pool = None
+    if args.replay:
+        args.corpus = os.path.abspath(args.corpus)
+        args.pool = recorded_symbols(args.corpus)
+        if not args.pool:
+            sys.exit(f"no Polygon recordings in {args.corpus}; record some with benchmarks.record_corpus")
+        print(f"replaying {args.corpus} ({len(args.pool)} symbols)", flush=True)
+
+    profile = UpstreamProfile(args.latency_ms, args.jitter_ms, args.error_rate, args.page_kb)
+    with tempfile.TemporaryDirectory() as tmp, BackgroundServers(profile) as fakes:
+        port = free_port()
+        # Replay keeps the real upstream URLs, since those are what the corpus is keyed by
+        stand_ins = {"REDIS_URL": fakes.env["REDIS_URL"]} if args.replay else fakes.env
+        env = {
+            **os.environ,
+            **stand_ins,
+            "DATABASE_URL": f"sqlite:///{tmp}/loadtest.db",
+            "SYMBOLS_FILE": os.path.join(tmp, "no-symbols.csv"),
+            "LOG_LEVEL": "WARNING",
+            "PYTHONPATH": ROOT,
+        }
+        if args.replay:
+            env.update({
+                "UPSTREAM_MODE": "replay",
+                "UPSTREAM_CORPUS": args.corpus,
+                "UPSTREAM_REPLAY_DELAY_SCALE": str(args.replay_delay_scale),
+            })
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            env=env, cwd=ROOT
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_for_health(base_url, server)
+            results = asyncio.run(run_http_scenarios(base_url, args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        if "batch" in args.scenarios:
+            results["batch"] = run_batch(env, args)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Record Polygon and MarketWatch responses into an upstream corpus.
+
+Without --fakes this calls the real upstreams (POLYGON_API_KEY must be set);
+with --fakes it records the local stand-ins from benchmarks/fakes.py, which is
+how the bundled synthetic corpus is produced. Either way the corpus is keyed
+by the real upstream URLs, and it is written to UPSTREAM_CORPUS unless --corpus
+says otherwise, so UPSTREAM_MODE=replay serves it with the same settings.
+
+Usage: python -m benchmarks.record_corpus AAPL MSFT [--corpus PATH] [--fakes]
+"""
+import argparse
+import asyncio
+import os
+
+import httpx
+
+from app.config import settings
+from app.exceptions import ExternalAPIException
+from app.recording import RecordingTransport, UpstreamCorpus, upstream_corpus
+from app.services.marketwatch import MarketWatchService
+from app.services.polygon import PolygonService
+from benchmarks.fakes import BackgroundServers, UpstreamProfile
+
+# Synthetic corpus recorded from the fakes and committed with the benchmarks
+BUNDLED_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "upstream.jsonl.gz")
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Sends requests for the real upstream hosts to local fakes, keeping path and query"""
+
+    def __init__(self, ports: dict):
+        self.ports = ports
+        self.transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.ports[request.url.host])
+        forwarded = httpx.Request(request.method, url, headers=request.headers, content=await request.aread())
+        return await self.transport.handle_async_request(forwarded)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+async def record(symbols, corpus: UpstreamCorpus, inner=None):
+    polygon, marketwatch = PolygonService(), MarketWatchService()
+    if inner is not None:
+        polygon._client = httpx.AsyncClient(timeout=30.0, transport=RecordingTransport(corpus, inner))
+        marketwatch._client = httpx.AsyncClient(timeout=30.0, transport=RecordingTransport(corpus, inner))
+    try:
+        for symbol in symbols:
+            for name, call in (("polygon", polygon.get_daily_open_close), ("marketwatch", marketwatch.get_performance_data)):
+                try:
+                    await call(symbol)
+                    print(f"recorded {name} {symbol}")
+                except ExternalAPIException as e:
+                    # Error responses are recorded too; replaying them is part of the point
+                    print(f"recorded {name} {symbol} ({e.message})")
+    finally:
+        await polygon.close()
+        await marketwatch.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--corpus", default=settings.UPSTREAM_CORPUS)
+    parser.add_argument("--fakes", action="store_true", help="record benchmarks/fakes.py instead of the real upstreams")
+    parser.add_argument("--page-kb", type=int, default=200, help="size of fake MarketWatch pages")
+    args = parser.parse_args()
+
+    corpus = upstream_corpus(args.corpus)
+    if not args.fakes:
+        settings.UPSTREAM_MODE = "record"
+        settings.UPSTREAM_CORPUS = args.corpus
+        asyncio.run(record(args.symbols, corpus))
+    else:
+        with BackgroundServers(UpstreamProfile(page_kb=args.page_kb)) as fakes:
+            ports = {
+                httpx.URL(settings.POLYGON_URL).host: fakes.polygon_port,
+                httpx.URL(settings.MARKETWATCH_BASE_URL).host: fakes.marketwatch_port,
+            }
+            asyncio.run(record(args.symbols, corpus, RedirectTransport(ports)))
+    print(f"{len(corpus)} responses in {args.corpus}")
+
+if __name__ == "__main__":
+    main()